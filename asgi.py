@@ -0,0 +1,307 @@
+"""ASGI deployment of the API, serving the hot reads on SQLAlchemy async sessions.
+
+    uvicorn --factory asgi:create_asgi_app --workers 4
+
+GET /products, /products/<id>, /customers, /customers/<id>,
+/customers/<id>/orders and /orders are answered on the event loop, so a
+worker waiting on the database keeps serving other connections. Their bodies,
+status codes and ETag/Last-Modified validators are the same as the Flask
+views', built from the same queries and row serializers. Every other
+request (writes, streams, ?include=orders, search, stats) is passed to the
+Flask app, which runs in a thread pool.
+"""
+import contextlib
+import random
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route, Router
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from app import create_app
+from conditional import as_http_date, make_etag
+from fast_serialization import encode_json
+from fieldsets import FieldsError, fields_arg, row_serializer, select_columns
+from models import Customer, Order, Product
+from pagination import PaginationError, finish_page, keyset_page, next_link, page_args
+from replicas import pinned_to_primary, replica_keys
+from routes import (
+    CUSTOMER_COLUMNS, CUSTOMER_SORT_KEYS, ORDER_COLUMNS, ORDER_SORT_KEYS, PRODUCT_COLUMNS, PRODUCT_SORT_KEYS,
+    customer_orders_state, order_lines_query, serialize_orders, serialize_product_row, table_state,
+)
+from schemas import customer_schema, customers_schema, orders_schema, product_schema, products_schema
+from streaming import NDJSON_MIMETYPE
+
+# backend -> its asyncio driver
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql", "mariadb": "aiomysql"}
+
+
+def async_database_url(url):
+    """The same database as url, through the backend's asyncio driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"no asyncio driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def json_body(data, status=200, float_values=()):
+    return Response(encode_json(data, float_values), status_code=status, media_type="application/json")
+
+
+def not_modified(request, etag, last_modified):
+    """conditional.is_not_modified() for a Starlette request."""
+    if_none_match = parse_etags(request.headers.get("if-none-match"))
+    if if_none_match:
+        return if_none_match.contains(etag)
+    since = parse_date(request.headers.get("if-modified-since"))
+    if since is not None and last_modified is not None:
+        return last_modified <= since
+    return False
+
+
+async def conditional(request, validators, view, vary=None):
+    """conditional.conditional(): answer 304 from validators before the view serializes anything."""
+    if validators is None:
+        return await view()
+    etag, last_modified = validators
+    last_modified = as_http_date(last_modified)
+    if not_modified(request, etag, last_modified):
+        response = Response(status_code=304)
+    else:
+        response = await view()
+        if response.status_code != 200:
+            return response
+    response.headers["ETag"] = f'"{etag}"'
+    if vary:
+        response.headers["Vary"] = vary
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def full_path(request):
+    # werkzeug's Request.full_path, which the Flask views put in listing ETags
+    return f"{request.url.path}?{request.scope['query_string'].decode()}"
+
+
+async def table_validators(session, request, *models):
+    """routes.table_validators() on an async session, which only serves the JSON representation."""
+    parts = [full_path(request), "application/json"]
+    last_modified = None
+    for model in models:
+        count, latest = (await session.execute(table_state(model))).one()
+        parts += [count, latest]
+        if latest is not None and (last_modified is None or latest > last_modified):
+            last_modified = latest
+    return make_etag(*parts), last_modified
+
+
+def wants_stream(request):
+    # loose on purpose: anything that might be a streaming export is left to the Flask view to decide
+    return "stream" in request.query_params or NDJSON_MIMETYPE in request.headers.get("accept", "")
+
+
+def with_next_link(response, request, next_cursor):
+    """pagination.add_next_link() for a Starlette request."""
+    if next_cursor:
+        response.headers["Link"] = next_link(request.url.path, request.query_params, next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+async def rows_page(session, request, columns, schema, sort_keys, default_sort, pk_column, where=None):
+    """A keyset page of plain rows, as the Flask list views read it: (rows, names, next_cursor)."""
+    args = request.query_params
+    names = fields_arg(schema, args)
+    limit, cursor, sort_column, descending = page_args(sort_keys, default_sort, args)
+    query = select(*select_columns(columns, names, sort_column, pk_column))
+    if where is not None:
+        query = query.where(where)
+    query, keys = keyset_page(query, pk_column, sort_column, limit, cursor, descending)
+    rows, next_cursor = finish_page((await session.execute(query)).all(), keys, limit)
+    return rows, names, next_cursor
+
+
+async def orders_body(session, rows, names):
+    lines_query = order_lines_query(rows, names)
+    lines = [] if lines_query is None else (await session.execute(lines_query)).all()
+    data, floats = serialize_orders(rows, lines, names)
+    return json_body(data, float_values=floats)
+
+
+# Handlers return a response, or None to hand the request to the Flask view.
+
+async def get_products(request, session):
+    if wants_stream(request):
+        return None
+
+    async def view():
+        rows, names, next_cursor = await rows_page(
+            session, request, PRODUCT_COLUMNS, products_schema, PRODUCT_SORT_KEYS, "product_id", Product.product_id)
+        serialize = row_serializer(product_schema, names)
+        floats = [row.price for row in rows] if "price" in names else ()
+        return with_next_link(json_body([serialize(row) for row in rows], float_values=floats), request, next_cursor)
+
+    return await conditional(request, await table_validators(session, request, Product), view, vary="Accept")
+
+
+async def get_product_by_id(request, session, product_id):
+    query = select(*PRODUCT_COLUMNS, Product.version, Product.updated_at).where(Product.product_id == product_id)
+    row = (await session.execute(query)).first()
+    validators = None
+    if row is not None:
+        validators = make_etag("product", product_id, row.version, request.query_params.get("fields")), row.updated_at
+
+    async def view():
+        names = fields_arg(product_schema, request.query_params)
+        if row is None:
+            return json_body({"error": "Product not found"}, 404)
+        product = serialize_product_row(row)
+        return json_body({name: product[name] for name in names}, float_values=[row.price])
+
+    return await conditional(request, validators, view)
+
+
+async def get_customers(request, session):
+    if wants_stream(request) or request.query_params.get("include") == "orders":
+        return None
+
+    async def view():
+        rows, names, next_cursor = await rows_page(
+            session, request, CUSTOMER_COLUMNS, customers_schema, CUSTOMER_SORT_KEYS, "customer_id", Customer.customer_id)
+        serialize = row_serializer(customer_schema, names)
+        return with_next_link(json_body([serialize(row) for row in rows]), request, next_cursor)
+
+    return await conditional(request, await table_validators(session, request, Customer), view, vary="Accept")
+
+
+async def get_customer_by_id(request, session, id):
+    query = select(Customer.version, Customer.updated_at).where(Customer.customer_id == id)
+    row = (await session.execute(query)).first()
+    validators = None
+    if row is not None:
+        validators = make_etag("customer", id, row.version, request.query_params.get("fields")), row.updated_at
+
+    async def view():
+        names = fields_arg(customer_schema, request.query_params)
+        query = select(*select_columns(CUSTOMER_COLUMNS, names)).where(Customer.customer_id == id)
+        customer = (await session.execute(query)).first()
+        if customer is None:
+            return json_body({"error": "Customer not found"}, 404)
+        return json_body(row_serializer(customer_schema, names)(customer))
+
+    return await conditional(request, validators, view)
+
+
+async def get_customer_orders(request, session, id):
+    count, versions, latest, product_versions, products_modified = (await session.execute(customer_orders_state(id))).one()
+    validators = None
+    if count:
+        etag = make_etag(full_path(request), count, versions, product_versions)
+        validators = etag, max(filter(None, [latest, products_modified]))
+
+    async def view():
+        rows, names, next_cursor = await rows_page(
+            session, request, ORDER_COLUMNS, orders_schema, {"date": Order.date}, "-date", Order.order_id,
+            where=Order.customer_id == id)
+        if not rows:
+            found = (await session.execute(select(Customer.customer_id).where(Customer.customer_id == id))).first()
+            if found is None:
+                return json_body({"error": "Customer not found"}, 404)
+        return with_next_link(await orders_body(session, rows, names), request, next_cursor)
+
+    return await conditional(request, validators, view)
+
+
+async def get_orders(request, session):
+    if wants_stream(request):
+        return None
+
+    async def view():
+        rows, names, next_cursor = await rows_page(
+            session, request, ORDER_COLUMNS, orders_schema, ORDER_SORT_KEYS, "order_id", Order.order_id)
+        return with_next_link(await orders_body(session, rows, names), request, next_cursor)
+
+    return await conditional(request, await table_validators(session, request, Order, Product), view, vary="Accept")
+
+
+class Endpoint:
+    """ASGI app for one path: GETs go to the async handler, the rest (and whatever it declines) to Flask.
+
+    Like replicas.init_replicas() does for the Flask views, handlers read from
+    a random replica unless the client is pinned to the primary.
+    """
+
+    def __init__(self, handler, sessions, replica_sessions, fallback):
+        self.handler = handler
+        self.sessions = sessions
+        self.replica_sessions = replica_sessions
+        self.fallback = fallback
+
+    def session_for(self, request):
+        if self.replica_sessions and not pinned_to_primary(request.headers, request.cookies):
+            return random.choice(self.replica_sessions)()
+        return self.sessions()
+
+    async def __call__(self, scope, receive, send):
+        response = None
+        if scope["method"] == "GET":
+            request = Request(scope, receive)
+            try:
+                async with self.session_for(request) as session:
+                    response = await self.handler(request, session, **request.path_params)
+            except (PaginationError, FieldsError) as err:
+                response = json_body({"error": str(err)}, 400)
+        if response is None:
+            await self.fallback(scope, receive, send)
+            return
+        if "origin" in request.headers:
+            # what flask_cors.CORS(app) adds with its defaults
+            response.headers["Access-Control-Allow-Origin"] = request.headers["origin"]
+            response.headers["Vary"] = "Origin"
+        await response(scope, receive, send)
+
+
+def create_asgi_app(config=None):
+    """Build the ASGI app: the Flask app from create_app(config), plus async handlers for the hot reads.
+
+    Both use the app's SQLALCHEMY_DATABASE_URI and replica binds (the async
+    engines through the backend's asyncio driver) and SQLALCHEMY_ENGINE_OPTIONS,
+    so the DB_POOL_* settings apply to each pool.
+    """
+    flask_app = create_app(config)
+    options = flask_app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    binds = flask_app.config.get("SQLALCHEMY_BINDS") or {}
+    engine = create_async_engine(async_database_url(flask_app.config["SQLALCHEMY_DATABASE_URI"]), **options)
+    replica_engines = [create_async_engine(async_database_url(binds[key]), **options) for key in replica_keys(binds)]
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    replica_sessions = [async_sessionmaker(replica, expire_on_commit=False) for replica in replica_engines]
+    fallback = WSGIMiddleware(flask_app)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        for each in [engine, *replica_engines]:
+            await each.dispose()
+
+    def route(path, handler):
+        return Route(path, Endpoint(handler, sessions, replica_sessions, fallback))
+
+    return Router(
+        routes=[
+            route("/products", get_products),
+            route("/products/{product_id:int}", get_product_by_id),
+            route("/customers", get_customers),
+            route("/customers/{id:int}", get_customer_by_id),
+            route("/customers/{id:int}/orders", get_customer_orders),
+            route("/orders", get_orders),
+        ],
+        default=fallback,
+        redirect_slashes=False,
+        lifespan=lifespan,
+    )
@@ -0,0 +1,502 @@
+"""Endpoint benchmarks against a seeded local database.
+
+Seeds a database (a throwaway SQLite file by default, or any DATABASE_URL),
+drives every API route through the WSGI test client and reports req/s,
+p50/p95/p99 latency and queries per request for each one:
+
+    python bench.py --customers 1000 --products 5000 --orders 10000
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --compare bench_baseline.json
+
+Before timing anything it EXPLAINs the routes' hot queries and exits if one
+of them scans a table or a whole index (or sorts) instead of seeking in one.
+
+With --compare the run fails (exit status 1) when an endpoint issues more
+queries per request than the baseline, or its p50 latency is more than
+--tolerance slower.
+
+--replica-url seeds a second database identically and serves reads from it
+as a read replica, after checking that reads are routed to it and that a
+client that just wrote is routed to the primary.
+
+--stock-stress N races N threads placing orders for two products with
+stock for only half of them, and fails if any unit was oversold or lost.
+
+--serialization-rows N also times marshmallow + jsonify() against the
+plain-row serializers the list routes use, on N products and N orders, and
+fails if their bodies differ by a single byte.
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from models import db, Customer, Order, Product, order_product
+from schemas import products_schema, orders_schema
+from pagination import encode_cursor, keyset_page
+import routes
+
+_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def seed(app, customers, products, orders, lines_per_order, spares, rng):
+    """Fill the database with deterministic rows; returns the ids the scenarios may use."""
+    now = datetime.datetime(2024, 1, 1)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Customer), [
+            {"name": f"Customer {i}", "email": f"customer{i}@example.com", "phone": f"555{i:07d}",
+             "version": 1, "updated_at": now}
+            for i in range(customers + spares)
+        ])
+        prices = [round(rng.uniform(1, 500), 2) for _ in range(products + spares)]
+        db.session.execute(insert(Product), [
+            {"name": f"{rng.choice(['Blue', 'Red', 'Green', 'Large', 'Small'])} widget {i}",
+             "price": price, "stock": 10**6, "version": 1, "updated_at": now}
+            for i, price in enumerate(prices)
+        ])
+        lines = []
+        totals = [0.0] * (orders + spares)
+        for order_id in range(1, orders + 1):
+            for product_id in rng.sample(range(1, products + 1), min(lines_per_order, products)):
+                quantity = rng.randint(1, 3)
+                lines.append({"order_id": order_id, "product_id": product_id,
+                              "quantity": quantity, "unit_price": prices[product_id - 1]})
+                totals[order_id - 1] += quantity * prices[product_id - 1]
+        start = datetime.date(2020, 1, 1)
+        db.session.execute(insert(Order), [
+            {"customer_id": rng.randint(1, customers), "date": start + datetime.timedelta(days=rng.randint(0, 1500)),
+             "total": round(total, 2), "version": 1, "updated_at": now}
+            for total in totals
+        ])
+        db.session.execute(insert(order_product), lines)
+        db.session.commit()
+    # the spare rows at the end of each table are only touched by the DELETE scenarios
+    return {
+        "customers": customers, "products": products, "orders": orders,
+        "spare_customers": list(range(customers + 1, customers + spares + 1)),
+        "spare_products": list(range(products + 1, products + spares + 1)),
+        "spare_orders": list(range(orders + 1, orders + spares + 1)),
+    }
+
+
+def scenarios(ids, rng):
+    """name -> (method, url rule, function(i) -> (url, json body[, headers]))."""
+    def some(table):
+        return rng.randint(1, ids[table])
+
+    def product_ids(count=3):
+        return rng.sample(range(1, ids["products"] + 1), count)
+
+    return {
+        "home": ("GET", "/", lambda i: ("/", None)),
+        "list_products": ("GET", "/products", lambda i: ("/products?limit=100", None)),
+        "list_products_by_price": ("GET", "/products", lambda i: ("/products?limit=100&sort=-price", None)),
+        "list_products_sparse": ("GET", "/products", lambda i: ("/products?limit=100&fields=name,price", None)),
+        "stream_products": ("GET", "/products", lambda i: ("/products?stream=1", None)),
+        "get_product": ("GET", "/products/<int:product_id>", lambda i: (f"/products/{some('products')}", None)),
+        "search_products": ("GET", "/products/by-name", lambda i: (f"/products/by-name?name=widget {rng.randint(1, 99)}", None)),
+        "add_product": ("POST", "/products", lambda i: ("/products", {"name": f"Bench product {i}", "price": 9.99, "stock": 100})),
+        "add_products_bulk": ("POST", "/products/bulk", lambda i: ("/products/bulk",
+                                                          [{"name": f"Bulk product {i}-{n}", "price": 1.5} for n in range(100)])),
+        "update_product": ("PUT", "/products/<int:product_id>", lambda i: (f"/products/{some('products')}",
+                                                                   {"name": f"Renamed widget {i}", "price": 12.5})),
+        "delete_product": ("DELETE", "/products/<int:product_id>", lambda i: (f"/products/{ids['spare_products'][i]}", None)),
+        "list_customers": ("GET", "/customers", lambda i: ("/customers?limit=100", None)),
+        "list_customers_with_orders": ("GET", "/customers", lambda i: ("/customers?limit=20&include=orders", None)),
+        "get_customer": ("GET", "/customers/<int:id>", lambda i: (f"/customers/{some('customers')}", None)),
+        "customer_orders": ("GET", "/customers/<int:id>/orders", lambda i: (f"/customers/{some('customers')}/orders?limit=20", None)),
+        "add_customer": ("POST", "/customers", lambda i: ("/customers",
+                                                  {"name": f"Bench {i}", "email": f"bench{i}@example.com", "phone": "5550000000"})),
+        "add_customers_bulk": ("POST", "/customers/bulk", lambda i: ("/customers/bulk",
+                                                            [{"name": f"Bulk {i}-{n}", "email": "bulk@example.com", "phone": "5551111111"}
+                                                             for n in range(100)])),
+        "update_customer": ("PUT", "/customers/<int:id>", lambda i: (f"/customers/{some('customers')}",
+                                                              {"name": f"Updated {i}", "email": "updated@example.com", "phone": "5552222222"})),
+        "delete_customer": ("DELETE", "/customers/<int:id>", lambda i: (f"/customers/{ids['spare_customers'][i]}", None)),
+        "list_orders": ("GET", "/orders", lambda i: ("/orders?limit=100", None)),
+        "list_orders_by_date": ("GET", "/orders", lambda i: ("/orders?limit=100&sort=-date", None)),
+        "list_orders_sparse": ("GET", "/orders", lambda i: ("/orders?limit=100&fields=order_id,date", None)),
+        "get_order": ("GET", "/orders/<int:order_id>", lambda i: (f"/orders/{some('orders')}", None)),
+        "add_order": ("POST", "/orders", lambda i: ("/orders",
+                                            {"customer_id": some("customers"), "date": "2024-06-01",
+                                             "products": product_ids(4) + [{"product_id": product_ids(1)[0], "quantity": 2}]})),
+        # ten keys, so all but the first request for each is a replay
+        "add_order_idempotent": ("POST", "/orders", lambda i: ("/orders",
+                                                       {"customer_id": 1, "date": "2024-06-01", "products": [i % 10 + 1]},
+                                                       {"Idempotency-Key": f"bench-order-{i % 10}"})),
+        "update_order": ("PUT", "/orders/<int:order_id>", lambda i: (f"/orders/{some('orders')}", {"products": product_ids(3)})),
+        "delete_order": ("DELETE", "/orders/<int:order_id>", lambda i: (f"/orders/{ids['spare_orders'][i]}", None)),
+        "pool_stats": ("GET", "/db/pool", lambda i: ("/db/pool", None)),
+        "cache_stats": ("GET", "/cache/stats", lambda i: ("/cache/stats", None)),
+    }
+
+
+def check_coverage(app, cases):
+    """Every route the app serves must have at least one scenario."""
+    covered = {(rule, method) for method, rule, _ in cases.values()}
+    missing = sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static" and not rule.rule.startswith("/debug/")
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+        if (rule.rule, method) not in covered
+    )
+    if missing:
+        sys.exit("No benchmark scenario for: " + ", ".join(missing))
+
+
+def hot_queries():
+    """The statements behind the routes' filters and sorts, as the routes build them."""
+    def page(columns, pk, sort_column, cursor_values):
+        return keyset_page(select(*columns), pk, sort_column, 100, encode_cursor(cursor_values))[0]
+
+    return {
+        "products by name": page(routes.PRODUCT_COLUMNS, Product.product_id, Product.name, ["M", 1]),
+        "products by price": page(routes.PRODUCT_COLUMNS, Product.product_id, Product.price, [100.0, 1]),
+        "products named": select(*routes.PRODUCT_COLUMNS).where(Product.name == "Red widget 1"),
+        "orders by date": page(routes.ORDER_COLUMNS, Order.order_id, Order.date, ["2022-01-01", 1]),
+        "orders of a customer": select(*routes.ORDER_COLUMNS).where(Order.customer_id == 1),
+        "customer order history": keyset_page(select(*routes.ORDER_COLUMNS).where(Order.customer_id == 1),
+                                              Order.order_id, Order.date, 100, encode_cursor(["2022-01-01", 1]), True)[0],
+        "customer order validators": routes.customer_orders_state(1),
+        "orders with a product": select(order_product.c.order_id).where(order_product.c.product_id == 1),
+    }
+
+
+def explain(connection, prefix, statement):
+    """EXPLAIN statement with its values as bound parameters, the way the routes send it.
+
+    Literal values would let the planner derive range bounds that a
+    parameterized query does not get.
+    """
+    compiled = statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return connection.exec_driver_sql(f"{prefix} {compiled}", params)
+
+
+def plan_problems(connection, statement):
+    """EXPLAIN statement and return the plan lines that read a whole table or index, or sort, if any.
+
+    A keyset page must seek to its cursor: walking an index from its start
+    (SQLite's SCAN ... USING INDEX, a Postgres index scan without an Index Cond,
+    MySQL's type=index) is reported like a table scan, since its cost grows
+    with the page's depth.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        lines = [row[3] for row in explain(connection, "EXPLAIN QUERY PLAN", statement)]
+        return [line for line in lines if line.startswith("SCAN") or "TEMP B-TREE" in line]
+    if dialect == "postgresql":
+        # tiny benchmark tables are cheaper to scan; ask whether an index *can* serve the query
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        lines = [row[0] for row in explain(connection, "EXPLAIN", statement)]
+        problems = [line.strip() for line in lines if "Seq Scan" in line]
+        for i, line in enumerate(lines):
+            if "Index Scan" in line or "Index Only Scan" in line:
+                indent = len(line) - len(line.lstrip())
+                details = []
+                for detail in lines[i + 1:]:
+                    if len(detail) - len(detail.lstrip()) <= indent or "->" in detail:
+                        break
+                    details.append(detail)
+                if not any("Index Cond" in detail for detail in details):
+                    problems.append(line.strip())
+        return problems
+    if dialect in ("mysql", "mariadb"):
+        rows = explain(connection, "EXPLAIN", statement).mappings().all()
+        return [f"{row['table']}: type={row['type']} key={row['key']} {row['Extra'] or ''}".strip()
+                for row in rows
+                if row["key"] is None or row["type"] in ("ALL", "index") or "filesort" in (row["Extra"] or "")]
+    return []
+
+
+def check_query_plans(app):
+    """Every hot query must be served by an index."""
+    failures = []
+    with app.app_context(), db.engine.connect() as connection:
+        for name, statement in hot_queries().items():
+            with connection.begin():
+                failures += [f"{name}: {line}" for line in plan_problems(connection, statement)]
+    if failures:
+        sys.exit("Queries without a usable index:\n  " + "\n  ".join(failures))
+
+
+def check_replica_routing(app):
+    """Reads must go to the replica, and to the primary from a client that just wrote."""
+    with app.app_context():
+        engines = {key or "primary": engine for key, engine in db.engines.items()}
+    used = set()
+    listeners = {name: lambda *args, name=name: used.add(name) for name in engines}
+    for name, listener in listeners.items():
+        event.listen(engines[name], "before_cursor_execute", listener)
+
+    failures = []
+
+    def expect(label, wanted, client, method, url, **kwargs):
+        used.clear()
+        response = client.open(url, method=method, **kwargs)
+        if used != {wanted}:
+            failures.append(f"{label} ({method} {url}) used {sorted(used)}, expected {wanted}")
+        return response
+
+    client = app.test_client()
+    expect("a read", "replica_0", client, "GET", "/products?limit=1")
+    wrote = expect("a write", "primary", client, "POST", "/customers",
+                   json={"name": "Replica check", "email": "replica-check@example.com", "phone": "5550000000"})
+    expect("a read after a write (cookie)", "primary", client, "GET", "/products?limit=1")
+    expect("a read after a write (header)", "primary", app.test_client(), "GET", "/products?limit=1",
+           headers={"X-Primary-Until": wrote.headers.get("X-Primary-Until", "")})
+    expect("another client's read", "replica_0", app.test_client(), "GET", "/products?limit=1")
+
+    for name, listener in listeners.items():
+        event.remove(engines[name], "before_cursor_execute", listener)
+    if failures:
+        sys.exit("Replica routing is wrong:\n  " + "\n  ".join(failures))
+
+
+def stock_stress(app, clients, orders_per_client=20):
+    """Race `clients` threads ordering two scarce products; exits if stock was oversold or lost.
+
+    There is stock for half the orders. Every order takes one unit of each
+    product, listing them in alternating order, so each accepted order must
+    show up exactly once in each product's stock.
+    """
+    stock = clients * orders_per_client // 2
+    with app.app_context():
+        scarce = [Product(name=f"Scarce widget {n}", price=2.5, stock=stock) for n in range(2)]
+        db.session.add_all(scarce)
+        db.session.commit()
+        first, second = (product.product_id for product in scarce)
+    start = threading.Barrier(clients)
+
+    def place_orders(n):
+        client = app.test_client()
+        statuses = collections.Counter()
+        start.wait()
+        for i in range(orders_per_client):
+            products = [first, second] if (n + i) % 2 else [second, first]
+            response = client.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": products})
+            statuses[response.status_code] += 1
+        return statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        statuses = sum(pool.map(place_orders, range(clients)), collections.Counter())
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        left = dict(db.session.execute(select(Product.product_id, Product.stock).where(Product.product_id.in_([first, second]))).all())
+        sold = dict(db.session.execute(
+            select(order_product.c.product_id, func.sum(order_product.c.quantity))
+            .where(order_product.c.product_id.in_([first, second]))
+            .group_by(order_product.c.product_id)
+        ).all())
+    placed = statuses.pop(201, 0)
+    rejected = statuses.pop(409, 0)
+    errors = sum(statuses.values())
+    print(f"stock stress: {clients} clients, {placed} orders placed, {rejected} rejected for stock, "
+          f"{errors} failed {dict(statuses) or ''}, stock left {left[first]}/{left[second]}, {elapsed:.2f}s")
+    failures = [
+        f"product {id}: {left[id]} left + {sold.get(id, 0)} sold != {stock} stocked, {placed} orders placed"
+        for id in (first, second)
+        if left[id] < 0 or left[id] + sold.get(id, 0) != stock or sold.get(id, 0) != placed
+    ]
+    if not errors and placed != stock:
+        failures.append(f"{placed} orders placed with stock for {stock}")
+    if failures:
+        sys.exit("Stock reservation is wrong:\n  " + "\n  ".join(failures))
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(app, cases, requests, warmup):
+    client = app.test_client()
+    results = {}
+    for name, (method, _, request) in cases.items():
+        if method == "GET":
+            for i in range(warmup):
+                url, body, *headers = request(requests + i)
+                client.open(url, method=method, json=body, headers=dict(*headers))
+        latencies = []
+        queries = []
+        started = time.perf_counter()
+        for i in range(requests):
+            url, body, *headers = request(i)
+            sent = time.perf_counter()
+            response = client.open(url, method=method, json=body, headers=dict(*headers))
+            response.get_data()  # drain streamed bodies inside the timing
+            latencies.append(time.perf_counter() - sent)
+            if response.status_code >= 400:
+                sys.exit(f"{name}: {method} {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            match = _QUERIES.search(response.headers.get("Server-Timing", ""))
+            queries.append(int(match.group(1)) if match else 0)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        results[name] = {
+            "requests": requests,
+            "req_per_s": round(requests / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "queries_per_request": round(statistics.mean(queries), 2),
+        }
+    return results
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def serialization(app, rows, repeat=5):
+    """Time schema dump + jsonify() against the plain-row path on the same rows; bodies must match."""
+    def products_marshmallow():
+        products = db.session.execute(select(Product).order_by(Product.product_id).limit(rows)).scalars().all()
+        return products_schema.jsonify(products).get_data()
+
+    def products_fast():
+        result = db.session.execute(select(*routes.PRODUCT_COLUMNS).order_by(Product.product_id).limit(rows)).all()
+        data = [routes.serialize_product_row(row) for row in result]
+        return routes.json_response(data, (row.price for row in result)).get_data()
+
+    def orders_marshmallow():
+        query = select(Order).order_by(Order.order_id).limit(rows).options(selectinload(Order.products))
+        return orders_schema.jsonify(db.session.execute(query).scalars().all()).get_data()
+
+    def orders_fast():
+        # what routes.get_orders does, minus pagination
+        result = db.session.execute(select(*routes.ORDER_COLUMNS).order_by(Order.order_id).limit(rows)).all()
+        return routes.orders_response(result, orders_schema.Meta.fields).get_data()
+
+    results = {}
+    with app.test_request_context():
+        for name, slow, fast in (("products", products_marshmallow, products_fast),
+                                 ("orders", orders_marshmallow, orders_fast)):
+            slow_s, slow_body = best_of(repeat, lambda: (db.session.expunge_all(), slow())[1])
+            fast_s, fast_body = best_of(repeat, fast)
+            if slow_body != fast_body:
+                sys.exit(f"serialization: {name} bodies differ between the two paths")
+            results[name] = {"rows": rows, "bytes": len(fast_body), "marshmallow_ms": round(slow_s * 1000, 1),
+                             "fast_ms": round(fast_s * 1000, 1), "speedup": round(slow_s / fast_s, 1)}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of regressions against a saved baseline."""
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            failures.append(f"{name}: {current['queries_per_request']} queries/request "
+                            f"(baseline {previous['queries_per_request']})")
+        if current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p50 {current['p50_ms']} ms (baseline {previous['p50_ms']} ms, "
+                            f"tolerance {tolerance:.0%})")
+    return failures
+
+
+def print_table(results):
+    print(f"{'endpoint':<28} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['req_per_s']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['queries_per_request']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="database to seed (default: a temporary SQLite file). It is wiped first!")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines-per-order", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed GET requests per scenario")
+    parser.add_argument("--only", help="comma-separated scenario names to run")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--stock-stress", type=int, default=0, metavar="N",
+                        help="also race N concurrent clients for scarce stock and check nothing is oversold")
+    parser.add_argument("--replica-url", help="second database to seed the same way and read from as a replica. It is wiped first!")
+    parser.add_argument("--serialization-rows", type=int, default=0, metavar="N",
+                        help="also compare the two list serialization paths on N rows (seeds at least N products and orders)")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown vs. baseline (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    if args.database_url:
+        url = args.database_url
+    else:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    # keep the header on (query counts come from it) and logging out of the measurements
+    config = {"SQLALCHEMY_DATABASE_URI": url, "SERVER_TIMING": True, "LOG_LEVEL": "WARNING", "SQLALCHEMY_BINDS": {}}
+    products = max(args.products, args.serialization_rows)
+    orders = max(args.orders, args.serialization_rows)
+    if args.replica_url:
+        # no replication here: the replica gets the same rows and never sees the benchmark's writes
+        replica = create_app(dict(config, SQLALCHEMY_DATABASE_URI=args.replica_url))
+        seed(replica, args.customers, products, orders, args.lines_per_order, args.requests, random.Random(args.seed))
+        config["SQLALCHEMY_BINDS"] = {"replica_0": args.replica_url}
+    app = create_app(config)
+
+    ids = seed(app, args.customers, products, orders, args.lines_per_order, args.requests, rng)
+    cases = scenarios(ids, rng)
+    check_coverage(app, cases)
+    check_query_plans(app)
+    if args.replica_url:
+        check_replica_routing(app)
+    if args.stock_stress:
+        stock_stress(app, args.stock_stress)
+    if args.only:
+        cases = {name: cases[name] for name in args.only.split(",")}
+
+    if args.serialization_rows:
+        # measured first, on the freshly seeded rows
+        print(f"{'serialization':<28} {'rows':>9} {'bytes':>10} {'marshmallow ms':>15} {'fast ms':>9} {'speedup':>8}")
+        for name, r in serialization(app, args.serialization_rows).items():
+            print(f"{name:<28} {r['rows']:>9} {r['bytes']:>10} {r['marshmallow_ms']:>15} {r['fast_ms']:>9} {r['speedup']:>7}x")
+        print()
+
+    results = run(app, cases, args.requests, args.warmup)
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        if failures:
+            print("Regressions:\n  " + "\n  ".join(failures))
+            return 1
+        print("No regressions against", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Sync vs async throughput with many concurrent connections.
+
+Seeds a database like bench.py, then serves it twice: with gunicorn threaded
+workers (the Flask app) and with uvicorn (asgi.py). Each server gets the same
+mix of GETs on the async-served read endpoints from N concurrent keep-alive
+connections for --duration seconds, for every N in --concurrency:
+
+    python bench_concurrency.py --concurrency 100,500,1000 --duration 10
+    python bench_concurrency.py --database-url postgresql://user:pw@localhost/bench
+
+The default database is a temporary SQLite file; SQLite answers in
+microseconds, so the async advantage shows best against a networked
+database. Load comes from --clients processes so the client is not the
+bottleneck.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app import create_app
+from bench import percentile, seed
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(kind, port, workers, threads):
+    if kind == "sync":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+                "--threads", str(threads), "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "wsgi:app"]
+    return [sys.executable, "-m", "uvicorn", "--factory", "asgi:create_asgi_app", "--workers", str(workers),
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"]
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"server exited with status {process.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"server at {url} did not come up within {timeout}s")
+
+
+def request_paths(ids, count, rng):
+    """A fixed, shuffled mix of the read endpoints both servers answer."""
+    makers = [
+        lambda: "/products?limit=20",
+        lambda: f"/products/{rng.randint(1, ids['products'])}",
+        lambda: f"/customers/{rng.randint(1, ids['customers'])}/orders?limit=10",
+        lambda: "/orders?limit=20",
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+async def _load(base_url, paths, connections, duration):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def connection(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += connections
+                sent = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(connection(offset) for offset in range(connections)))
+    return latencies, errors
+
+
+def load(args):
+    """One client process: `connections` concurrent connections for `duration` seconds."""
+    return asyncio.run(_load(*args))
+
+
+def measure(base_url, paths, connections, duration, clients):
+    shares = [connections // clients + (1 if i < connections % clients else 0) for i in range(clients)]
+    jobs = [(base_url, paths[i::clients], share, duration) for i, share in enumerate(shares) if share]
+    started = time.perf_counter()
+    with multiprocessing.Pool(len(jobs)) as pool:
+        results = pool.map(load, jobs)
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for share, _ in results for latency in share)
+    errors = sum(errors for _, errors in results)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="database to seed (default: a temporary SQLite file). It is wiped first!")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", default="100,500,1000", help="comma-separated connection counts")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per server and concurrency level")
+    parser.add_argument("--workers", type=int, default=2, help="server worker processes (both servers)")
+    parser.add_argument("--threads", type=int, default=8, help="threads per gunicorn worker")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1), help="load generator processes")
+    parser.add_argument("--servers", default="sync,async")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url, "LOG_LEVEL": "WARNING"})
+    ids = seed(app, args.customers, args.products, args.orders, 5, 0, rng)
+    paths = request_paths(ids, 10000, rng)
+    env = dict(os.environ, DATABASE_URL=url, LOG_LEVEL="WARNING", WORKER_CLASS="gthread")
+
+    print(f"{'server':<8} {'conns':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'errors':>7}")
+    for kind in args.servers.split(","):
+        port = free_port()
+        process = subprocess.Popen(server_command(kind, port, args.workers, args.threads), env=env)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_up(base_url, process)
+            measure(base_url, paths, 10, 1, 1)  # warm up every worker's pools and caches
+            for connections in (int(n) for n in args.concurrency.split(",")):
+                r = measure(base_url, paths, connections, args.duration, args.clients)
+                print(f"{kind:<8} {connections:>6} {r['req_per_s']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} "
+                      f"{r['mean_ms']:>9} {r['errors']:>7}", flush=True)
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class MemoryStore:
+    """Local stand-in for a shared L2 store, with the same get/set/delete interface as RedisStore."""
+
+    # per process, like the L1: other workers never see its writes
+    shared = False
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            raw, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+        return json.loads(raw)
+
+    def set(self, key, value):
+        raw = json.dumps(value)
+        with self._lock:
+            self._data[key] = (raw, time.monotonic() + self.ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisStore:
+    """Shared L2 store backed by Redis. Needs the optional redis package."""
+
+    shared = True
+
+    def __init__(self, url, ttl=300, prefix="e_commerce_api:"):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+
+def make_store(spec, ttl=300):
+    """Build the L2 store from config: "" for none, "memory", or a redis:// URL."""
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemoryStore(ttl)
+    return RedisStore(spec, ttl)
+
+
+class TwoTierCache:
+    """Read-through cache: L1 in-process LRU, then the optional shared L2 store, then the loader.
+
+    Values must be JSON-serializable so they can live in the L2 store. Writers
+    call refresh() or invalidate() after committing, so both tiers change together.
+    That only reaches the writer's own L1, though: with a shared L2 the L1 is not
+    used, so no worker keeps serving an entry another worker has replaced.
+    """
+
+    def __init__(self, l1, l2=None):
+        self.l1 = l1
+        self.l2 = l2
+        self.use_l1 = not getattr(l2, "shared", False)
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.loads = 0
+
+    def get(self, key, loader):
+        if self.use_l1:
+            value = self.l1.get(key)
+            if value is not None:
+                return value
+        if self.l2 is not None:
+            value = self.l2.get(key)
+            if value is not None:
+                self.l2_hits += 1
+                if self.use_l1:
+                    self.l1.set(key, value)
+                return value
+            self.l2_misses += 1
+        self.loads += 1
+        value = loader()
+        if value is not None:
+            self.refresh(key, value)
+        return value
+
+    def refresh(self, key, value):
+        if self.l2 is not None:
+            self.l2.set(key, value)
+        if self.use_l1:
+            self.l1.set(key, value)
+
+    def invalidate(self, key):
+        if self.l2 is not None:
+            self.l2.delete(key)
+        self.l1.delete(key)
+
+    def stats(self):
+        return {
+            "l1": self.l1.stats() if self.use_l1 else None,
+            "l2": None if self.l2 is None else {"hits": self.l2_hits, "misses": self.l2_misses},
+            "loads": self.loads,
+        }
@@ -0,0 +1,58 @@
+import datetime
+import functools
+import hashlib
+
+from flask import Response, make_response, request
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def as_http_date(value):
+    """Validators come out of the database as naive UTC datetimes; HTTP dates have second precision."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.replace(tzinfo=datetime.timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(validators, vary=None):
+    """Answer conditional GETs from cheap validators before the view serializes anything.
+
+    validators is called with the view's arguments and returns (etag, last_modified),
+    or None when there is nothing to validate against (the view then runs as usual,
+    e.g. to produce its 404). Views that pick their representation from a request
+    header name it in vary, and their validators must tell the representations apart.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            found = validators(*args, **kwargs)
+            if found is None:
+                return view(*args, **kwargs)
+            etag, last_modified = found
+            last_modified = as_http_date(last_modified)
+            if is_not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if vary:
+                response.vary.add(vary)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# environment variable -> (create_engine option, parser)
+POOL_SETTINGS = {
+    "DB_POOL_SIZE": ("pool_size", int),
+    "DB_MAX_OVERFLOW": ("max_overflow", int),
+    "DB_POOL_TIMEOUT": ("pool_timeout", float),
+    "DB_POOL_RECYCLE": ("pool_recycle", int),
+    "DB_POOL_PRE_PING": ("pool_pre_ping", lambda value: value.lower() in ("1", "true", "yes")),
+}
+
+
+def engine_options_from_env(environ=os.environ):
+    """Engine options for SQLALCHEMY_ENGINE_OPTIONS, taken from the DB_POOL_* variables that are set.
+
+    Unset variables keep SQLAlchemy's defaults, which also keeps SQLite's
+    pools (which reject pool_size/max_overflow) working out of the box.
+    """
+    options = {}
+    for name, (option, parse) in POOL_SETTINGS.items():
+        value = environ.get(name)
+        if value not in (None, ""):
+            options[option] = parse(value)
+    return options
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PoolMetrics:
+    """Checkout counters and wait times for an engine's connection pool.
+
+    Waits are timed around Pool.connect(), which is where a request blocks when
+    the pool is exhausted; the last `window` waits are kept for percentiles.
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+
+    def instrument(self, engine):
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "checkin", self._on_checkin)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+        self._time_connect(engine.pool)
+        # dispose() swaps in a fresh pool; event listeners carry over, the timing wrapper doesn't
+        event.listen(engine, "engine_disposed", lambda engine: self._time_connect(engine.pool))
+
+    def _time_connect(self, pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                waited = time.perf_counter() - started
+                with self._lock:
+                    self._waits.append(waited)
+                    self.max_wait = max(self.max_wait, waited)
+
+        pool.connect = timed_connect
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+            }
+            max_wait = self.max_wait
+        # QueuePool reports its state; simpler pools (SQLite's) don't have these methods
+        state = {
+            name: getattr(pool, name)() if hasattr(pool, name) else None
+            for name in ("size", "checkedin", "checkedout", "overflow")
+        }
+        return {
+            "pool": type(pool).__name__,
+            "size": state["size"],
+            "idle": state["checkedin"],
+            "checked_out": state["checkedout"],
+            # QueuePool counts overflow from -pool_size; only connections beyond pool_size are overflow
+            "overflow": None if state["overflow"] is None else max(0, state["overflow"]),
+            **counters,
+            "wait_ms": {
+                "p50": None if not waits else round(_percentile(waits, 0.50) * 1000, 3),
+                "p95": None if not waits else round(_percentile(waits, 0.95) * 1000, 3),
+                "p99": None if not waits else round(_percentile(waits, 0.99) * 1000, 3),
+                "max": round(max_wait * 1000, 3),
+            },
+        }
@@ -0,0 +1,73 @@
+"""Serialize plain result rows without marshmallow, with output identical to the schemas'.
+
+compile_row_serializer() turns a schema into a generated function mapping a
+row tuple to the dict schema.dump() would build, and encode_json() encodes it
+with orjson when installed (it handles dates natively), falling back to the
+standard library whenever orjson's bytes could differ from Flask's jsonify().
+json_response() wraps that in a Flask response.
+"""
+import datetime
+import json
+
+from flask import Response, current_app
+from marshmallow import fields
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same bytes, just slower
+    orjson = None
+
+# marshmallow field type -> conversion its _serialize applies; other fields pass values through
+_CONVERSIONS = ((fields.Integer, "int"), (fields.Float, "float"))
+
+
+def compile_row_serializer(schema, names):
+    """Return serialize(row) -> dict for rows whose values come in `names` order.
+
+    Keys and conversions are read from the schema's dump fields once, so the
+    per-row work is a single generated dict literal.
+    """
+    items = []
+    for position, name in enumerate(names):
+        field = schema.dump_fields[name]
+        value = f"row[{position}]"
+        conversion = next((conv for field_type, conv in _CONVERSIONS if isinstance(field, field_type)), None)
+        if conversion:
+            value = f"(None if {value} is None else {conversion}({value}))"
+        items.append(f"{field.data_key or name!r}: {value}")
+    source = f"def serialize(row):\n    return {{{', '.join(items)}}}\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace["serialize"]
+
+
+def _default(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _plain_floats(values):
+    # Python and orjson agree on float text only in this range (no exponent, no NaN/inf)
+    return all(value == 0 or 1e-4 <= abs(value) < 1e16 for value in values if value is not None)
+
+
+def encode_json(data, float_values=()):
+    """The body Flask's default JSON provider (compact, sorted keys, ASCII) would send for data.
+
+    float_values are the floats in data; orjson is only used when they print
+    the same way in both encoders and the output is pure ASCII.
+    """
+    if orjson is not None and _plain_floats(float_values):
+        encoded = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        if encoded.isascii():
+            return encoded + b"\n"
+    return (json.dumps(data, default=_default, separators=(",", ":"), sort_keys=True) + "\n").encode()
+
+
+def json_response(data, float_values=()):
+    """A JSON response with the same bytes Flask's jsonify(data) would send."""
+    provider = current_app.json
+    if current_app.debug or provider.compact is False or not provider.sort_keys or not provider.ensure_ascii:
+        return provider.response(data)
+    return Response(encode_json(data, float_values), mimetype=provider.mimetype)
@@ -0,0 +1,59 @@
+"""Sparse fieldsets: ?fields=name,price limits a response to those schema fields.
+
+The requested names drive both what is selected from the database (a column
+list for plain-row queries, load_only() for ORM ones) and what is serialized
+(a row serializer compiled for just those fields, or a schema built with only=).
+"""
+from functools import lru_cache
+
+from flask import request
+
+from fast_serialization import compile_row_serializer
+
+
+class FieldsError(ValueError):
+    """An invalid ?fields= value; the message is safe to return to the client."""
+
+
+def fields_arg(schema, args=None):
+    """The fields named by ?fields=, in the schema's Meta.fields order; every field when it is absent."""
+    allowed = schema.Meta.fields
+    spec = (request.args if args is None else args).get("fields")
+    if spec is None:
+        return tuple(allowed)
+    names = {name.strip() for name in spec.split(",") if name.strip()}
+    if not names:
+        raise FieldsError("fields must name at least one field")
+    unknown = names.difference(allowed)
+    if unknown:
+        raise FieldsError(f"unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(allowed)})")
+    return tuple(name for name in allowed if name in names)
+
+
+def select_columns(columns, names, *required):
+    """The columns behind `names`, in that order, followed by any `required` ones not already included.
+
+    Row serializers read values by position, so the requested columns come first;
+    required columns (the pk and sort key that cursors are built from, join keys)
+    are fetched but not serialized. Names that aren't columns (nested fields) are skipped.
+    """
+    by_key = {column.key: column for column in columns}
+    selected = [by_key[name] for name in names if name in by_key]
+    for column in required:
+        if all(column.key != chosen.key for chosen in selected):
+            selected.append(column)
+    return selected
+
+
+@lru_cache(maxsize=None)
+def row_serializer(schema, names):
+    """compile_row_serializer(), compiled once per schema and field subset."""
+    return compile_row_serializer(schema, names)
+
+
+@lru_cache(maxsize=None)
+def partial_schema(schema, names):
+    """A copy of schema limited to `names` (itself when that is every field), built once per subset."""
+    if names == tuple(schema.Meta.fields):
+        return schema
+    return type(schema)(only=names, many=schema.many)
@@ -0,0 +1,56 @@
+"""gunicorn settings for serving wsgi:app in production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app) and the workers fork
+from it, sharing its memory copy-on-write. Workers are threaded by default;
+WORKER_CLASS=gevent switches to gevent (needs the gevent package, and
+psycogreen for Postgres through psycopg2).
+
+- BIND - address to listen on (default 0.0.0.0:8000)
+- WEB_CONCURRENCY - worker processes (default 2 x CPUs + 1)
+- WORKER_CLASS - gthread (default) or gevent
+- WORKER_THREADS - threads per gthread worker (default 4)
+- WORKER_CONNECTIONS - concurrent requests per gevent worker (default 1000)
+"""
+import gc
+import multiprocessing
+import os
+
+worker_class = os.getenv("WORKER_CLASS", "gthread")
+if worker_class not in ("gthread", "gevent"):
+    raise RuntimeError(f"WORKER_CLASS must be gthread or gevent, not {worker_class!r}")
+
+if worker_class == "gevent":
+    # patch before the app is preloaded, so everything it imports sees cooperative sockets and locks
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        pass
+    else:
+        patch_psycopg()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("WORKER_THREADS", 4))
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", 1000))
+preload_app = True
+
+
+def when_ready(server):
+    # everything allocated by the imports and create_app() is long-lived; move it out of
+    # the collector's reach so collections in the workers don't touch (and copy) those pages
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # workers respawned later also fork from a frozen heap
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork(worker.app.wsgi())
@@ -0,0 +1,98 @@
+"""Idempotency-Key support for the create endpoints: a retried request gets the first one's response.
+
+The key is claimed with an INSERT before the view runs and the response is
+stored after it, both in the request's transaction, so a key is recorded
+together with the rows it created or not at all. A duplicate that arrives
+while the first request is still running blocks on the key's primary key
+until that transaction ends; it then replays the stored response, or runs
+itself if the first request failed and was rolled back.
+"""
+import datetime
+import functools
+import hashlib
+import os
+
+from flask import Response, current_app, jsonify, make_response, request
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, utcnow, IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl(app=None):
+    """How long a key is replayed for: IDEMPOTENCY_KEY_TTL seconds, default a day."""
+    app = app or current_app
+    return datetime.timedelta(seconds=int(app.config.get("IDEMPOTENCY_KEY_TTL", os.getenv("IDEMPOTENCY_KEY_TTL", 86400))))
+
+
+def request_fingerprint():
+    return hashlib.sha256(b"\0".join([request.method.encode(), request.path.encode(), request.get_data()])).hexdigest()
+
+
+def claim(key, fingerprint):
+    """Take key for this request; returns None once it is ours, or the live row of an earlier request.
+
+    The INSERT is the request's first write, so rolling back after a conflict
+    loses nothing. An expired row is deleted and the key claimed again.
+    """
+    for _ in range(2):
+        try:
+            db.session.execute(insert(IdempotencyKey).values(key=key, fingerprint=fingerprint, created_at=utcnow()))
+            return None
+        except IntegrityError:
+            db.session.rollback()
+        existing = db.session.get(IdempotencyKey, key)
+        if existing is not None and existing.created_at >= utcnow() - key_ttl():
+            return existing
+        if existing is not None:
+            db.session.expunge(existing)
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    return db.session.get(IdempotencyKey, key)
+
+
+def replay(existing, fingerprint):
+    if existing.fingerprint != fingerprint:
+        return jsonify({"error": f"{HEADER} was already used for a different request"}), 422
+    if existing.status_code is None:
+        return jsonify({"error": f"A request with this {HEADER} is still in progress"}), 409
+    response = Response(existing.response_body, status=existing.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """Run a create view once per Idempotency-Key; repeats of the request replay its response.
+
+    Requests without the header run as usual. Only successful responses are
+    stored: an error is rolled back with the key, so the client can retry it.
+    A key reused with a different method, path or body is refused with 422.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+        fingerprint = request_fingerprint()
+        existing = claim(key, fingerprint)
+        if existing is not None:
+            return replay(existing, fingerprint)
+        response = make_response(view(*args, **kwargs))
+        if response.status_code < 400:
+            db.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=response.status_code, response_body=response.get_data(as_text=True))
+            )
+        return response
+    return wrapper
+
+
+def purge_expired_keys(app=None):
+    """Delete the keys past their TTL; returns how many there were."""
+    statement = delete(IdempotencyKey).where(IdempotencyKey.created_at < utcnow() - key_ttl(app))
+    return db.session.execute(statement).rowcount
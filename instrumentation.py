@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+
+@contextmanager
+def timed_phase(name):
+    """Add the time spent in the block to the current request's `name` phase.
+
+    Re-entering a phase that is already being timed (nested schemas dumping
+    their children) is not counted twice.
+    """
+    timing = g.get("_timing") if has_request_context() else None
+    if timing is None or name in timing["active"]:
+        yield
+        return
+    timing["active"].add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing["phases"][name] = timing["phases"].get(name, 0.0) + time.perf_counter() - started
+        timing["active"].discard(name)
+
+
+class RequestTimings:
+    """Recent per-request timings plus running per-endpoint totals, for the debug endpoint."""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=window)
+        self.endpoints = {}
+
+    def record(self, entry):
+        with self._lock:
+            self.recent.append(entry)
+            totals = self.endpoints.setdefault(entry["endpoint"], {"requests": 0, "queries": 0, "total_ms": 0.0, "db_ms": 0.0})
+            totals["requests"] += 1
+            totals["queries"] += entry["queries"]
+            totals["total_ms"] += entry["total_ms"]
+            totals["db_ms"] += entry["phases_ms"].get("db", 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "requests": totals["requests"],
+                    "avg_queries": round(totals["queries"] / totals["requests"], 2),
+                    "avg_total_ms": round(totals["total_ms"] / totals["requests"], 3),
+                    "avg_db_ms": round(totals["db_ms"] / totals["requests"], 3),
+                }
+                for endpoint, totals in self.endpoints.items()
+            }
+            return {"endpoints": endpoints, "recent": list(self.recent)}
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # on the execution context, not conn.info: after_cursor_execute never fires for a failed
+    # statement, and the context goes away with it while conn.info lives as long as the pooled connection
+    context._query_started = time.perf_counter()
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._query_started
+    timing = g.get("_timing") if has_request_context() else None
+    if timing is not None:
+        timing["queries"] += 1
+        timing["phases"]["db"] = timing["phases"].get("db", 0.0) + time.perf_counter() - started
+
+
+def init_instrumentation(app, db):
+    """Time SQL, schema serialization and JSON encoding per request and report them in Server-Timing.
+
+    The header is on by default (SERVER_TIMING=0 turns it off); the
+    /debug/timings endpoint is only registered when TIMING_DEBUG_ENDPOINT is set.
+    Register this before the unit of work so the commit is counted.
+    """
+    timings = RequestTimings()
+    app.extensions["request_timings"] = timings
+    server_timing = str(app.config.get("SERVER_TIMING", os.getenv("SERVER_TIMING", "1"))).lower() not in ("0", "false", "no")
+
+    with app.app_context():
+        for engine in db.engines.values():  # the primary and any replicas
+            event.listen(engine, "before_cursor_execute", _on_before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _on_after_cursor_execute)
+
+    @app.before_request
+    def start_timing():
+        g._timing = {"started": time.perf_counter(), "queries": 0, "phases": {}, "active": set()}
+
+    @app.after_request
+    def report_timing(response):
+        timing = g.pop("_timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing["started"]
+        phases = timing["phases"]
+        phases["app"] = max(0.0, total - sum(phases.values()))
+        phases_ms = {name: round(seconds * 1000, 3) for name, seconds in phases.items()}
+        if server_timing:
+            metrics = [f'db;dur={phases_ms.get("db", 0.0)};desc="{timing["queries"]} queries"']
+            metrics += [f"{name};dur={phases_ms[name]}" for name in ("serialize", "json", "app") if name in phases_ms]
+            metrics.append(f"total;dur={round(total * 1000, 3)}")
+            response.headers.add("Server-Timing", ", ".join(metrics))
+        timings.record({
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": timing["queries"],
+            "total_ms": round(total * 1000, 3),
+            "phases_ms": phases_ms,
+        })
+        return response
+
+    if app.config.get("TIMING_DEBUG_ENDPOINT", os.getenv("TIMING_DEBUG_ENDPOINT")):
+        @app.route("/debug/timings", methods=["GET"])
+        def get_request_timings():
+            return jsonify(timings.snapshot())
@@ -0,0 +1,42 @@
+"""Index updated_at for the listing validators, replacing the per-table change counters
+
+Revision ID: 1937c6099b95
+Revises: 3b6e1f8d0a42
+Create Date: 2026-10-19 14:02:33.169574
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1937c6099b95'
+down_revision = '3b6e1f8d0a42'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('Customers', 'Orders', 'Products')
+
+
+def upgrade():
+    op.drop_table('Table_Versions')
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in reversed(VERSIONED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+
+    table_versions = op.create_table('Table_Versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    op.bulk_insert(table_versions, [{'table_name': table, 'version': 1, 'updated_at': now} for table in VERSIONED_TABLES])
@@ -0,0 +1,63 @@
+"""Initial schema: customers, accounts, orders, products and order lines
+
+Revision ID: 1f0c8e2a4b7d
+Revises: 
+Create Date: 2026-10-18 21:40:12.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f0c8e2a4b7d'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Customers',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=320), nullable=False),
+    sa.Column('phone', sa.String(length=15), nullable=False),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_table('Products',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_table('Customer_Accounts',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['Customers.customer_id'], ),
+    sa.PrimaryKeyConstraint('account_id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('Orders',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['Customers.customer_id'], ),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+    op.create_table('Order_Product',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['Orders.order_id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['Products.product_id'], ),
+    sa.PrimaryKeyConstraint('order_id', 'product_id')
+    )
+
+
+def downgrade():
+    op.drop_table('Order_Product')
+    op.drop_table('Orders')
+    op.drop_table('Customer_Accounts')
+    op.drop_table('Products')
+    op.drop_table('Customers')
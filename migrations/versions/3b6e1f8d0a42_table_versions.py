@@ -0,0 +1,36 @@
+"""Per-table change counters for the listing validators
+
+Revision ID: 3b6e1f8d0a42
+Revises: a93e5d0c17f8
+Create Date: 2026-10-19 11:12:40.527301
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b6e1f8d0a42'
+down_revision = 'a93e5d0c17f8'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('Customers', 'Orders', 'Products')
+
+
+def upgrade():
+    table_versions = op.create_table('Table_Versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # same rows as table_versions.seed_table_versions() creates for a fresh database
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    op.bulk_insert(table_versions, [{'table_name': table, 'version': 1, 'updated_at': now} for table in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('Table_Versions')
@@ -0,0 +1,61 @@
+"""Stored order totals, line quantities and unit-price snapshots
+
+Revision ID: 5e2b9d47a0f6
+Revises: c47e0b5d9a13
+Create Date: 2026-10-18 22:41:09.517320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b9d47a0f6'
+down_revision = 'c47e0b5d9a13'
+branch_labels = None
+depends_on = None
+
+orders = sa.table('Orders', sa.column('order_id', sa.Integer), sa.column('total', sa.Float))
+products = sa.table('Products', sa.column('product_id', sa.Integer), sa.column('price', sa.Float))
+order_product = sa.table(
+    'Order_Product',
+    sa.column('order_id', sa.Integer),
+    sa.column('product_id', sa.Integer),
+    sa.column('quantity', sa.Integer),
+    sa.column('unit_price', sa.Float),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('Order_Product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quantity', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total', sa.Float(), nullable=True))
+
+    # existing lines are snapshotted at today's prices, the best record there is
+    op.execute(order_product.update().values(
+        unit_price=sa.select(products.c.price)
+        .where(products.c.product_id == order_product.c.product_id)
+        .scalar_subquery()
+    ))
+    line_sum = (
+        sa.select(sa.func.sum(order_product.c.quantity * order_product.c.unit_price))
+        .where(order_product.c.order_id == orders.c.order_id)
+        .scalar_subquery()
+    )
+    op.execute(orders.update().values(total=sa.func.coalesce(sa.func.round(sa.cast(line_sum, sa.Numeric), 2), 0)))
+
+    with op.batch_alter_table('Order_Product', schema=None) as batch_op:
+        batch_op.alter_column('quantity', existing_type=sa.Integer(), server_default=None)
+        batch_op.alter_column('unit_price', existing_type=sa.Float(), nullable=False)
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.alter_column('total', existing_type=sa.Float(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.drop_column('total')
+    with op.batch_alter_table('Order_Product', schema=None) as batch_op:
+        batch_op.drop_column('unit_price')
+        batch_op.drop_column('quantity')
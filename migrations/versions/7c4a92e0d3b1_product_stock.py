@@ -0,0 +1,27 @@
+"""Product stock levels
+
+Revision ID: 7c4a92e0d3b1
+Revises: d81f3a6c5b29
+Create Date: 2026-10-18 23:58:17.604213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4a92e0d3b1'
+down_revision = 'd81f3a6c5b29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL is untracked: existing products keep selling until someone records what is on hand
+    with op.batch_alter_table('Products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('Products', schema=None) as batch_op:
+        batch_op.drop_column('stock')
@@ -0,0 +1,51 @@
+"""Row versions for ETags and the backend text index on product names
+
+Revision ID: 8a3d6f91c2e5
+Revises: 1f0c8e2a4b7d
+Create Date: 2026-10-18 21:52:47.630915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3d6f91c2e5'
+down_revision = '1f0c8e2a4b7d'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('Customers', 'Orders', 'Products')
+
+
+def upgrade():
+    for table in VERSIONED_TABLES:
+        # existing rows start at version 1; the defaults are only there to backfill them
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('version', server_default=None)
+            batch_op.alter_column('updated_at', server_default=None)
+
+    # same indexes as search.install_search_indexes() creates for a fresh database
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_products_name_trgm', 'Products', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    elif dialect in ('mysql', 'mariadb'):
+        op.create_index('ix_products_name_fulltext', 'Products', ['name'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_products_name_trgm', table_name='Products')
+    elif dialect in ('mysql', 'mariadb'):
+        op.drop_index('ix_products_name_fulltext', table_name='Products')
+
+    for table in reversed(VERSIONED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
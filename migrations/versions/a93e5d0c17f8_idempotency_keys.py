@@ -0,0 +1,37 @@
+"""Idempotency keys for the create endpoints
+
+Revision ID: a93e5d0c17f8
+Revises: 7c4a92e0d3b1
+Create Date: 2026-10-19 00:31:05.118672
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e5d0c17f8'
+down_revision = '7c4a92e0d3b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Idempotency_Keys',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql', 'mariadb'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('Idempotency_Keys', schema=None) as batch_op:
+        batch_op.create_index('ix_idempotency_keys_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Idempotency_Keys', schema=None) as batch_op:
+        batch_op.drop_index('ix_idempotency_keys_created_at')
+
+    op.drop_table('Idempotency_Keys')
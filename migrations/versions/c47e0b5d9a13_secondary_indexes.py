@@ -0,0 +1,42 @@
+"""Secondary indexes for the routes' filters and keyset sorts
+
+Revision ID: c47e0b5d9a13
+Revises: 8a3d6f91c2e5
+Create Date: 2026-10-18 22:05:31.904772
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e0b5d9a13'
+down_revision = '8a3d6f91c2e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Order_Product', schema=None) as batch_op:
+        batch_op.create_index('ix_order_product_product_id', ['product_id'], unique=False)
+
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_id', ['customer_id'], unique=False)
+        batch_op.create_index('ix_orders_date_order_id', ['date', 'order_id'], unique=False)
+
+    with op.batch_alter_table('Products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name_product_id', ['name', 'product_id'], unique=False)
+        batch_op.create_index('ix_products_price_product_id', ['price', 'product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_price_product_id')
+        batch_op.drop_index('ix_products_name_product_id')
+
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_date_order_id')
+        batch_op.drop_index('ix_orders_customer_id')
+
+    with op.batch_alter_table('Order_Product', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_product_product_id')
@@ -0,0 +1,29 @@
+"""Index for a customer's order history, newest first
+
+Revision ID: d81f3a6c5b29
+Revises: 5e2b9d47a0f6
+Create Date: 2026-10-18 23:12:54.208441
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3a6c5b29'
+down_revision = '5e2b9d47a0f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the composite index also serves customer_id lookups, so it replaces the single-column one
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_id_date_order_id', ['customer_id', 'date', 'order_id'], unique=False)
+        batch_op.drop_index('ix_orders_customer_id')
+
+
+def downgrade():
+    with op.batch_alter_table('Orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_customer_id', ['customer_id'], unique=False)
+        batch_op.drop_index('ix_orders_customer_id_date_order_id')
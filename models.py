@@ -0,0 +1,112 @@
+import datetime
+from typing import List, Optional
+from flask_sqlalchemy import SQLAlchemy 
+from sqlalchemy import text
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column 
+from search import install_search_indexes
+from replicas import RoutingSession
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+
+
+def utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class Versioned:
+    # both columns move on every UPDATE (ORM or Core) and feed the ETag/Last-Modified validators.
+    # version is a plain counter, not the ORM's version_id_col: concurrent writers of a row
+    # both succeed (last write wins) instead of the loser failing with StaleDataError
+    version: Mapped[int] = mapped_column(nullable=False, default=1, onupdate=text("version + 1"))
+    # indexed so the listings' max(updated_at) is one probe of the index's end
+    updated_at: Mapped[datetime.datetime] = mapped_column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, index=True)
+    # read the new version back with the UPDATE (RETURNING where supported) rather than lazily
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class Customer(Versioned, Base): 
+    __tablename__ = "Customers"     
+    customer_id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    email: Mapped[str] = mapped_column(db.String(320), nullable=False)
+    phone: Mapped[str] = mapped_column(db.String(15))
+    customer_account: Mapped["CustomerAccount"] = db.relationship(back_populates="customer")
+    orders: Mapped[List["Order"]] = db.relationship(back_populates="customer")
+    def __str__(self):
+        return {"customer_id": self.customer_id, "name": self.name, "email": self.email, "phone":self.phone}
+
+
+class CustomerAccount(Base):
+    __tablename__ = "Customer_Accounts"
+    account_id: Mapped[int] = mapped_column(primary_key=True)
+    username: Mapped[str] = mapped_column(db.String(255), unique=True, nullable=False)
+    password: Mapped[str] = mapped_column(db.String(255), nullable = False)
+    customer_id: Mapped[int] = mapped_column(db.ForeignKey('Customers.customer_id'))
+    customer: Mapped["Customer"] = db.relationship(back_populates="customer_account")
+
+order_product = db.Table(
+    "Order_Product", 
+    Base.metadata,
+    db.Column("order_id", db.ForeignKey("Orders.order_id"), primary_key=True),
+    db.Column("product_id", db.ForeignKey("Products.product_id"), primary_key=True),
+    db.Column("quantity", db.Integer, nullable=False, default=1),
+    # the product's price when it was added to the order; Orders.total is the sum of quantity * unit_price
+    db.Column("unit_price", db.Float, nullable=False),
+    # the (order_id, product_id) primary key can't serve "which orders contain this product"
+    db.Index("ix_order_product_product_id", "product_id"),
+)
+
+# Secondary indexes follow the routes' filters and keyset sorts, which always end in the pk.
+# Schema changes ship as migrations (migrations/versions); keep both in step.
+
+class Order(Versioned, Base):
+    __tablename__ = "Orders"
+    __table_args__ = (
+        # a customer's order history, newest first; also serves plain customer_id lookups
+        db.Index("ix_orders_customer_id_date_order_id", "customer_id", "date", "order_id"),
+        db.Index("ix_orders_date_order_id", "date", "order_id"),
+    )
+
+    order_id: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime.date] = mapped_column(db.Date, nullable = False)
+    customer_id: Mapped[int] = mapped_column(db.ForeignKey("Customers.customer_id"))
+    # maintained by the order routes in the same transaction as the lines
+    total: Mapped[float] = mapped_column(db.Float, nullable=False, default=0)
+    customer: Mapped["Customer"] = db.relationship(back_populates="orders")
+    # lines carry quantity/unit_price, so they are written with Core inserts rather than through this
+    products: Mapped[List["Product"]] = db.relationship(secondary=order_product, order_by="Product.product_id", viewonly=True)
+
+class Product(Versioned, Base):
+    __tablename__ = "Products"
+    __table_args__ = (
+        db.Index("ix_products_name_product_id", "name", "product_id"),
+        db.Index("ix_products_price_product_id", "price", "product_id"),
+    )
+    product_id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    price: Mapped[float] = mapped_column(db.Float, nullable=False)
+    # units on hand, or NULL when stock isn't tracked for the product (orders never run out of it);
+    # orders take it with a conditional UPDATE (routes.reserve_stock), never read-modify-write
+    stock: Mapped[Optional[int]] = mapped_column(nullable=True)
+
+install_search_indexes(Product.__table__, "name", "ix_products_name")
+
+
+class IdempotencyKey(Base):
+    """A create request's Idempotency-Key and, once it has committed, the response to replay for it."""
+    __tablename__ = "Idempotency_Keys"
+    __table_args__ = (db.Index("ix_idempotency_keys_created_at", "created_at"),)
+
+    key: Mapped[str] = mapped_column(db.String(255), primary_key=True)
+    # sha256 of the method, path and body, so a key reused for a different request is refused
+    fingerprint: Mapped[str] = mapped_column(db.String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(nullable=True)
+    # bulk create replies run to megabytes; MySQL's TEXT stops at 64 KB
+    response_body: Mapped[Optional[str]] = mapped_column(db.Text().with_variant(LONGTEXT(), "mysql", "mariadb"), nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(db.DateTime, nullable=False, default=utcnow)
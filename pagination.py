@@ -0,0 +1,136 @@
+import base64
+import datetime
+import json
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime.date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_values(cursor, count):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != count:
+        raise PaginationError("Invalid cursor")
+    return values
+
+
+def decode_cursor(cursor, columns):
+    values = _decode_values(cursor, len(columns))
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime.date:
+                value = datetime.date.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (ValueError, TypeError):
+            raise PaginationError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def offset_from_cursor(cursor):
+    """Decode the position cursor used for relevance-ranked results, which have no stable sort key."""
+    if not cursor:
+        return 0
+    offset = _decode_values(cursor, 1)[0]
+    if not isinstance(offset, int) or offset < 0:
+        raise PaginationError("Invalid cursor")
+    return offset
+
+
+def limit_arg(args=None):
+    args = request.args if args is None else args
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, MAX_LIMIT)
+
+
+def page_args(sort_keys, default_sort, args=None):
+    """Read ?limit=, ?cursor= and ?sort= from the request (or the given query args).
+
+    sort_keys maps the public sort name to its column; a leading "-" sorts descending.
+    """
+    args = request.args if args is None else args
+    limit = limit_arg(args)
+    sort = args.get("sort", default_sort)
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in sort_keys:
+        raise PaginationError(f"sort must be one of {', '.join(sorted(sort_keys))}")
+    return limit, args.get("cursor"), sort_keys[key], descending
+
+
+def keyset_page(query, pk_column, sort_column, limit, cursor=None, descending=False):
+    """Apply a keyset (seek) page to query, ordered by (sort_column, pk_column).
+
+    Each page is a range scan starting right after the cursor, so deep pages cost
+    the same as the first one. Returns the statement and the column list the
+    cursor values are read from.
+    """
+    columns = [pk_column] if sort_column is pk_column else [sort_column, pk_column]
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) == 1:
+            after = pk_column < values[0] if descending else pk_column > values[0]
+        else:
+            sort_value, pk_value = values
+            # the OR alone gives the planner no lower bound to seek to, so deep pages would
+            # walk the index from its start; the redundant range on sort_column is the seek
+            if descending:
+                after = and_(sort_column <= sort_value,
+                             or_(sort_column < sort_value, and_(sort_column == sort_value, pk_column < pk_value)))
+            else:
+                after = and_(sort_column >= sort_value,
+                             or_(sort_column > sort_value, and_(sort_column == sort_value, pk_column > pk_value)))
+        query = query.where(after)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    # one extra row tells us whether there is a next page without a COUNT(*)
+    return query.order_by(*order).limit(limit + 1), columns
+
+
+def finish_page(rows, columns, limit):
+    """Trim the look-ahead row and return (rows, next_cursor)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def next_link(path, args, next_cursor):
+    """The Link header value for the next page: the same path and query string with the new cursor.
+
+    Built from the request's own path rather than url_for(), so no query arg can
+    collide with the endpoint's or url_for's own arguments.
+    """
+    args = dict(args, cursor=next_cursor)
+    return f'<{path}?{urlencode(args, safe="!$()*,/:;?@")}>; rel="next"'
+
+
+def add_next_link(response, next_cursor):
+    if next_cursor:
+        response.headers["Link"] = next_link(request.script_root + request.path, request.args.to_dict(), next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
@@ -0,0 +1,92 @@
+"""Read-replica routing: read-only requests query a replica, writes and recent writers the primary.
+
+Replicas are extra Flask-SQLAlchemy binds ("replica_0", "replica_1", ...)
+taken from DATABASE_REPLICA_URLS. A successful write pins its client to the
+primary for READ_YOUR_WRITES_SECONDS (default 5): the response sets a
+primary_until cookie and an X-Primary-Until header holding the deadline, and
+reads that send either back before it passes are served by the primary, so a
+client never reads data older than its own writes.
+"""
+import contextlib
+import math
+import os
+import random
+import time
+
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+from unit_of_work import WRITE_METHODS
+
+REPLICA_BIND_PREFIX = "replica_"
+PIN_COOKIE = "primary_until"
+PIN_HEADER = "X-Primary-Until"
+
+
+def replica_binds_from_env(environ=os.environ):
+    """SQLALCHEMY_BINDS entries for the comma-separated DATABASE_REPLICA_URLS."""
+    urls = [url.strip() for url in environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    return {f"{REPLICA_BIND_PREFIX}{i}": url for i, url in enumerate(urls)}
+
+
+def replica_keys(binds):
+    return sorted(key for key in binds if key and key.startswith(REPLICA_BIND_PREFIX))
+
+
+def pinned_to_primary(headers, cookies, now=None):
+    """True while the client's read-your-writes deadline (header, else cookie) has not passed."""
+    value = headers.get(PIN_HEADER) or cookies.get(PIN_COOKIE)
+    try:
+        return float(value) > (time.time() if now is None else now)
+    except (TypeError, ValueError):
+        return False
+
+
+@contextlib.contextmanager
+def reading_from_primary():
+    """Send the block's queries to the primary, even in a request routed to a replica."""
+    key = g.pop("read_bind", None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if key is not None:
+            g.read_bind = key
+
+
+class RoutingSession(Session):
+    """db.session that sends a replica-routed request's queries to its replica.
+
+    Flushes always go to the primary; a read-only request never flushes, so
+    one that did would be a bug, not a stale read.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            key = g.get("read_bind")
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replicas(app, db):
+    """Route read-only requests to a random replica bind unless the client is pinned to the primary.
+
+    Does nothing when no replica binds are configured.
+    """
+    keys = replica_keys(app.config.get("SQLALCHEMY_BINDS") or {})
+    if not keys:
+        return
+    window = float(app.config.get("READ_YOUR_WRITES_SECONDS", os.getenv("READ_YOUR_WRITES_SECONDS", 5)))
+
+    @app.before_request
+    def choose_read_bind():
+        if request.method not in WRITE_METHODS and not pinned_to_primary(request.headers, request.cookies):
+            g.read_bind = random.choice(keys)
+
+    @app.after_request
+    def pin_writer_to_primary(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            until = f"{time.time() + window:.3f}"
+            response.set_cookie(PIN_COOKIE, until, max_age=math.ceil(window), httponly=True, samesite="Lax")
+            response.headers[PIN_HEADER] = until
+        return response
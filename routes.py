@@ -0,0 +1,784 @@
+import os
+import logging
+from collections import defaultdict
+from flask import Blueprint, jsonify, request 
+from sqlalchemy.orm import selectinload, raiseload, load_only
+from sqlalchemy import select, delete, insert, update, func, bindparam, case, text
+from marshmallow import ValidationError
+from models import db, utcnow, Customer, Order, Product, order_product
+from schemas import (
+    customer_schema, customers_schema, customer_orders_schema, customers_orders_schema,
+    product_schema, products_schema, order_schema, orders_schema,
+)
+from streaming import NDJSON_MIMETYPE, wants_stream, stream_ndjson
+from pagination import PaginationError, page_args, keyset_page, finish_page, add_next_link, limit_arg, offset_from_cursor, encode_cursor
+from search import TrigramIndex, ranked_search
+from cache import LRUCache, TwoTierCache, make_store
+from conditional import conditional, make_etag
+from dbpool import PoolMetrics
+from unit_of_work import on_commit
+from replicas import reading_from_primary
+from idempotency import idempotent
+from structured_logging import LOGGER_NAME
+from instrumentation import timed_phase
+from fast_serialization import compile_row_serializer, json_response
+from fieldsets import FieldsError, fields_arg, select_columns, row_serializer, partial_schema
+
+
+api = Blueprint("api", __name__)
+
+# pass plain values to log calls: messages are formatted later, on the logging thread
+log = logging.getLogger(LOGGER_NAME)
+
+# fallback for backends without a text index (SQLite); see search.TrigramIndex
+product_index = TrigramIndex(ttl=int(os.getenv("SEARCH_INDEX_TTL", 300)))
+
+# read-through cache of serialized products, keyed by product_id
+product_cache = TwoTierCache(
+    LRUCache(maxsize=int(os.getenv("PRODUCT_CACHE_SIZE", 1024)), ttl=int(os.getenv("PRODUCT_CACHE_TTL", 30))),
+    make_store(os.getenv("PRODUCT_CACHE_L2", "")),
+)
+
+
+def table_state(model):
+    """count, max(updated_at): changes whenever a row is added, updated or deleted.
+
+    Both are answered from indexes (max from the updated_at index's last entry),
+    and readers and writers never contend on a shared row for them.
+    """
+    return select(func.count(), func.max(model.updated_at)).select_from(model)
+
+def table_validators(*models):
+    """ETag/Last-Modified for a listing, from one cheap aggregate per table rather than hashing the body."""
+    # the JSON page and the NDJSON export of the same URL are different bodies
+    parts = [request.full_path, NDJSON_MIMETYPE if wants_stream() else "application/json"]
+    last_modified = None
+    for model in models:
+        count, latest = db.session.execute(table_state(model)).one()
+        parts += [count, latest]
+        if latest is not None and (last_modified is None or latest > last_modified):
+            last_modified = latest
+    return make_etag(*parts), last_modified
+
+BULK_MAX_ITEMS = 10000
+BULK_BATCH_SIZE = 1000
+
+def load_many(schema, items):
+    """Validate a list with a many=True schema; returns [(index, data)] for valid items and the errors by index."""
+    try:
+        return list(enumerate(schema.load(items))), {}
+    except ValidationError as err:
+        valid = [(index, data) for index, data in enumerate(err.valid_data) if index not in err.messages]
+        return valid, err.messages
+
+def insert_batch(model, pk, batch):
+    """INSERT a batch of row dicts as one multi-row statement; returns their generated ids in order.
+
+    Postgres and MariaDB hand the ids back from INSERT ... RETURNING, which
+    SQLAlchemy keeps in parameter order. MySQL and SQLite have no ordered
+    RETURNING, so the ids come from the statement's lastrowid: a multi-row INSERT
+    whose row count is known up front takes one consecutive run of auto-increment
+    values (InnoDB reserves them together, SQLite holds the write lock), and
+    lastrowid is the first of them on MySQL (LAST_INSERT_ID()) and the last on SQLite.
+    """
+    dialect = db.engine.dialect
+    if dialect.name == "postgresql" or (getattr(dialect, "is_mariadb", False) and dialect.insert_returning):
+        statement = insert(model).returning(getattr(model, pk), sort_by_parameter_order=True)
+        return db.session.execute(statement, batch).scalars().all()
+    last_id = db.session.execute(insert(model).values(batch)).lastrowid
+    if dialect.name == "sqlite":
+        return list(range(last_id - len(batch) + 1, last_id + 1))
+    step = db.session.execute(text("SELECT @@auto_increment_increment")).scalar()
+    return list(range(last_id, last_id + step * len(batch), step))
+
+def bulk_insert(model, pk, rows):
+    """Insert (index, data) rows in one transaction, BULK_BATCH_SIZE rows per INSERT statement.
+
+    Returns [{"index": ..., pk: ...}] so callers can match generated ids back to the request.
+    """
+    created = []
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        chunk = rows[start:start + BULK_BATCH_SIZE]
+        for _, data in chunk:
+            data.pop(pk, None)
+        # a multi-row VALUES list needs every row to name the same columns; optional fields default to NULL
+        columns = set().union(*(data for _, data in chunk))
+        batch = [{column: data.get(column) for column in columns} for _, data in chunk]
+        ids = insert_batch(model, pk, batch)
+        created += [{"index": index, pk: id} for (index, _), id in zip(chunk, ids)]
+    return created
+
+def bulk_response(created, errors):
+    return jsonify({"created": created, "errors": errors}), 201 if created else 400
+
+pool_metrics = PoolMetrics()
+
+# list pages select these columns as plain rows and build the schemas' output directly
+CUSTOMER_COLUMNS = (Customer.customer_id, Customer.email, Customer.name, Customer.phone)
+PRODUCT_COLUMNS = (Product.product_id, Product.name, Product.price, Product.stock)
+ORDER_COLUMNS = (Order.order_id, Order.customer_id, Order.date, Order.total)
+PRODUCT_SORT_KEYS = {"product_id": Product.product_id, "price": Product.price, "name": Product.name}
+CUSTOMER_SORT_KEYS = {"customer_id": Customer.customer_id}
+ORDER_SORT_KEYS = {"order_id": Order.order_id, "date": Order.date}
+serialize_product_row = compile_row_serializer(product_schema, [column.key for column in PRODUCT_COLUMNS])
+
+@api.errorhandler(FieldsError)
+def fields_error(err):
+    return jsonify({"error": str(err)}), 400
+
+def customers_validators():
+    if request.args.get("include") == "orders":
+        return table_validators(Customer, Order, Product)
+    return table_validators(Customer)
+
+@api.route("/customers", methods = ["GET"])
+@conditional(customers_validators, vary="Accept")
+def get_customers():
+    # ?include=orders nests each customer's orders (and their products) in the response
+    include_orders = request.args.get("include") == "orders"
+    names = fields_arg(customers_orders_schema if include_orders else customers_schema)
+    include_orders = include_orders and "orders" in names
+    only_columns = load_only(*select_columns(CUSTOMER_COLUMNS, names, Customer.customer_id), raiseload=True)
+    if wants_stream():
+        query = select(Customer).order_by(Customer.customer_id).options(only_columns)
+        if include_orders:
+            query = query.options(selectinload(Customer.orders).selectinload(Order.products))
+            return stream_ndjson(db.session, query, partial_schema(customer_orders_schema, names))
+        return stream_ndjson(db.session, query.options(raiseload("*")), partial_schema(customer_schema, names))
+    try:
+        limit, cursor, sort_column, descending = page_args(CUSTOMER_SORT_KEYS, "customer_id")
+        if include_orders:
+            query = select(Customer).options(only_columns)
+        else:
+            query = select(*select_columns(CUSTOMER_COLUMNS, names, sort_column, Customer.customer_id))
+        query, columns = keyset_page(query, Customer.customer_id, sort_column, limit, cursor, descending)
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+    if not include_orders:
+        rows, next_cursor = finish_page(db.session.execute(query).all(), columns, limit)
+        serialize = row_serializer(customer_schema, names)
+        with timed_phase("serialize"):
+            data = [serialize(row) for row in rows]
+        with timed_phase("json"):
+            response = json_response(data)
+        return add_next_link(response, next_cursor)
+    # 3 queries total: customers, their orders, and those orders' products
+    query = query.options(
+        selectinload(Customer.orders).options(
+            selectinload(Order.products),
+            raiseload("*"),
+        ),
+        raiseload("*"),
+    )
+    result = db.session.execute(query).scalars() 
+    customers, next_cursor = finish_page(result.all(), columns, limit)
+    return add_next_link(partial_schema(customers_orders_schema, names).jsonify(customers), next_cursor)
+
+def customer_validators(id):
+    row = db.session.execute(select(Customer.version, Customer.updated_at).where(Customer.customer_id == id)).first()
+    if row is None:
+        return None
+    return make_etag("customer", id, row.version, request.args.get("fields")), row.updated_at
+
+@api.route("/customers/<int:id>", methods=["GET"])
+@conditional(customer_validators)
+def get_customer_by_id(id):
+    names = fields_arg(customer_schema)
+    only_columns = load_only(*select_columns(CUSTOMER_COLUMNS, names, Customer.customer_id), raiseload=True)
+    customer = db.session.execute(select(Customer).where(Customer.customer_id == id).options(only_columns, raiseload("*"))).scalar()
+    if customer is None:
+        return jsonify({"error": "Customer not found"}), 404
+    return partial_schema(customer_schema, names).jsonify(customer)
+
+def customer_orders_state(id):
+    """count, sum(version), max(updated_at) over a customer's orders and the products on their lines.
+
+    One pass over the customer's orders and lines, so the count is of lines
+    (an order without any counts once) and an order's version is summed once
+    per line; both still move whenever an order is added, changed or deleted.
+    """
+    return (
+        select(func.count(), func.sum(Order.version), func.max(Order.updated_at),
+               func.sum(Product.version), func.max(Product.updated_at))
+        .select_from(Order)
+        .outerjoin(order_product, order_product.c.order_id == Order.order_id)
+        .outerjoin(Product, Product.product_id == order_product.c.product_id)
+        .where(Order.customer_id == id)
+    )
+
+def customer_orders_validators(id):
+    """Validators from the customer's orders and the products on them, not the whole catalog."""
+    count, versions, latest, product_versions, products_modified = db.session.execute(customer_orders_state(id)).one()
+    if count == 0:
+        # the view tells an unknown customer from one without orders
+        return None
+    etag = make_etag(request.full_path, count, versions, product_versions)
+    return etag, max(filter(None, [latest, products_modified]))
+
+@api.route("/customers/<int:id>/orders", methods=["GET"])
+@conditional(customer_orders_validators)
+def get_customer_orders(id):
+    # newest first; a range scan of the (customer_id, date, order_id) index per page
+    names = fields_arg(orders_schema)
+    try:
+        limit, cursor, sort_column, descending = page_args({"date": Order.date}, "-date")
+        query = select(*select_columns(ORDER_COLUMNS, names, sort_column, Order.order_id)).where(Order.customer_id == id)
+        query, columns = keyset_page(query, Order.order_id, sort_column, limit, cursor, descending)
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+    rows, next_cursor = finish_page(db.session.execute(query).all(), columns, limit)
+    if not rows and db.session.execute(select(Customer.customer_id).where(Customer.customer_id == id)).first() is None:
+        return jsonify({"error": "Customer not found"}), 404
+    return add_next_link(orders_response(rows, names), next_cursor)
+
+@api.route("/customers", methods = ["POST"])
+@idempotent
+def add_customer():
+    try:
+        customer_data = customer_schema.load(request.json)
+    except ValidationError as err:
+        return jsonify(err.messages), 400 
+    name = customer_data['name']
+    email = customer_data['email']
+    phone = customer_data['phone']
+    new_customer = Customer(name=name, email=email, phone=phone) 
+    db.session.add(new_customer)
+    return jsonify({"Message": "Created customer"}), 201
+
+    
+@api.route("/customers/bulk", methods=["POST"])
+@idempotent
+def add_customers_bulk():
+    items = request.json
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of customers"}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"error": f"At most {BULK_MAX_ITEMS} customers per request"}), 400
+    rows, errors = load_many(customers_schema, items)
+    created = bulk_insert(Customer, "customer_id", rows) if rows else []
+    return bulk_response(created, errors)
+
+@api.route("/customers/<int:id>", methods=["PUT"])
+def update_customer(id):
+    query = select(Customer).filter(Customer.customer_id == id)
+    result = db.session.execute(query).scalars().first()
+    if result is None:
+        return jsonify({"message": "Customer not found"}), 404 
+    customer = result
+    try: 
+        customer_data = customer_schema.load(request.json)
+    except ValidationError as err:
+        return jsonify(err.messages), 400 
+    for field, value in customer_data.items():
+        setattr(customer, field, value)
+
+    return jsonify({"message": "Customer details updated successfully"}), 200 
+
+
+@api.route("/customers/<int:id>", methods=["DELETE"])
+def delete_customer(id):
+    log.info("deleting customer %s", id, extra={"customer_id": id})
+    query = select(Customer).filter(Customer.customer_id == id)
+    result = db.session.execute(query).scalars().first()
+    if result is None:
+        return jsonify({"Error": " Customer Is Not Found! "}), 404
+    db.session.delete(result)
+    return jsonify({"Message": "Customer Has Been Successfully Removed! "})
+
+
+
+@api.route('/products', methods=["POST"])
+@idempotent
+def add_product():
+    try:
+
+        product_data = product_schema.load(request.json)
+    except ValidationError as err:
+        return jsonify(err.messages), 400 
+
+    new_product = Product(name=product_data['name'], price=product_data['price'], stock=product_data.get('stock'))
+    db.session.add(new_product)
+    db.session.flush()
+    product_id = new_product.product_id
+    cached = product_cache_entry(new_product)
+    on_commit(lambda: product_index.add(product_id, product_data['name']))
+    on_commit(lambda: product_cache.refresh(f"product:{product_id}", cached))
+
+    return jsonify({"Message": "New product successfully added!"}), 201 
+@api.route('/products/bulk', methods=["POST"])
+@idempotent
+def add_products_bulk():
+    items = request.json
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of products"}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"error": f"At most {BULK_MAX_ITEMS} products per request"}), 400
+    rows, errors = load_many(products_schema, items)
+    created = bulk_insert(Product, "product_id", rows) if rows else []
+    names = dict((index, data["name"]) for index, data in rows)
+
+    def index_products():
+        for item in created:
+            product_index.add(item["product_id"], names[item["index"]])
+
+    on_commit(index_products)
+    return bulk_response(created, errors)
+
+@api.route('/products', methods=["GET"])
+@conditional(lambda: table_validators(Product), vary="Accept")
+def get_products():
+    names = fields_arg(products_schema)
+    if wants_stream():
+        only_columns = load_only(*select_columns(PRODUCT_COLUMNS, names, Product.product_id), raiseload=True)
+        query = select(Product).order_by(Product.product_id).options(only_columns)
+        return stream_ndjson(db.session, query, partial_schema(product_schema, names))
+    try:
+        limit, cursor, sort_column, descending = page_args(PRODUCT_SORT_KEYS, "product_id")
+        query = select(*select_columns(PRODUCT_COLUMNS, names, sort_column, Product.product_id))
+        query, columns = keyset_page(query, Product.product_id, sort_column, limit, cursor, descending)
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+    rows, next_cursor = finish_page(db.session.execute(query).all(), columns, limit)
+    serialize = row_serializer(product_schema, names)
+    with timed_phase("serialize"):
+        data = [serialize(row) for row in rows]
+    with timed_phase("json"):
+        response = json_response(data, (row.price for row in rows) if "price" in names else ())
+    return add_next_link(response, next_cursor)
+
+def product_cache_entry(product):
+    return {
+        "product": product_schema.dump(product),
+        "version": product.version,
+        "updated_at": product.updated_at.isoformat(),
+    }
+
+def load_product(product_id):
+    def load():
+        # the entry is served to every client, pinned writers included, so never fill it from a lagging replica
+        with reading_from_primary():
+            query = select(Product).filter(Product.product_id == product_id)
+            result = db.session.execute(query).scalar()
+            return None if result is None else product_cache_entry(result)
+
+    return product_cache.get(f"product:{product_id}", load)
+
+def product_validators(product_id):
+    entry = load_product(product_id)
+    if entry is None:
+        return None
+    return make_etag("product", product_id, entry["version"], request.args.get("fields")), entry["updated_at"]
+
+@api.route("/products/<int:product_id>", methods=["GET"])
+@conditional(product_validators)
+def get_product_by_id(product_id):
+    # the cache holds the whole product; ?fields= only trims what is sent
+    names = fields_arg(product_schema)
+    entry = load_product(product_id)
+    if entry is None:
+        log.debug("product %s not found", product_id, extra={"product_id": product_id})
+        return jsonify({"error": "Product not found"}), 404 
+    return jsonify({name: entry["product"][name] for name in names})
+
+@api.route("/db/pool", methods=["GET"])
+def get_pool_stats():
+    return jsonify(pool_metrics.snapshot(db.engine.pool))
+
+@api.route("/cache/stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify({"products": product_cache.stats()})
+
+@api.route("/products/by-name", methods=["GET"])
+@conditional(lambda: table_validators(Product))
+def get_product_by_name():
+    name = (request.args.get("name") or "").strip()
+    if not name:
+        return jsonify({"error": "name is required"}), 400
+    names = fields_arg(products_schema)
+    only_columns = load_only(*select_columns(PRODUCT_COLUMNS, names, Product.product_id), raiseload=True)
+    try:
+        limit = limit_arg()
+        offset = offset_from_cursor(request.args.get("cursor"))
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+
+    # ranked by relevance through the database's trigram/full-text index where there is one
+    query = ranked_search(select(Product).options(only_columns), Product.name, Product.product_id, db.engine.dialect.name, name)
+    if query is not None:
+        products = db.session.execute(query.offset(offset).limit(limit + 1)).scalars().all()
+    else:
+        if product_index.is_stale():
+            product_index.build(db.session.execute(select(Product.product_id, Product.name)).all())
+        ids = product_index.search(name)[offset:offset + limit + 1]
+        query = select(Product).where(Product.product_id.in_(ids)).options(only_columns)
+        by_id = {p.product_id: p for p in db.session.execute(query).scalars()}
+        products = [by_id[id] for id in ids if id in by_id]
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor([offset + limit])
+    return add_next_link(partial_schema(products_schema, names).jsonify(products), next_cursor)
+
+@api.route("/products/<int:product_id>", methods=["PUT"])
+def update_product(product_id):
+    query = select(Product).filter(Product.product_id == product_id)
+    result = db.session.execute(query).scalar() 
+    log.debug("updating product %s", product_id, extra={"product_id": product_id})
+    if result is None:
+        return jsonify({"error": "Product not found!"}), 404
+    product = result
+    try:
+        product_data = product_schema.load(request.json)
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+    for field, value in product_data.items():
+        setattr(product, field, value)
+
+    db.session.flush()
+    cached = product_cache_entry(product)
+    on_commit(lambda: product_index.add(product_id, product_data['name']))
+    on_commit(lambda: product_cache.refresh(f"product:{product_id}", cached))
+    return jsonify({"message": "Product details succesfully updated!"}), 200 
+@api.route("/products/<int:product_id>", methods=["DELETE"])
+def delete_product(product_id):
+    # breakpoint()
+    delete_statement = delete(Product).where(Product.product_id==product_id)
+    result = db.session.execute(delete_statement)
+    if result.rowcount == 0:
+        return jsonify({"error": "Product not found"}), 404
+    on_commit(lambda: product_index.remove(product_id))
+    on_commit(lambda: product_cache.invalidate(f"product:{product_id}"))
+
+    return jsonify({"message": "Product successfully deleted!"}), 200
+
+LINES_ERROR = "products must be a list of product IDs or {product_id, quantity} objects"
+
+def order_lines(products):
+    """The request's products as {product_id: quantity}, or None when malformed.
+
+    Each item is a product ID (quantity 1) or {"product_id": ..., "quantity": ...};
+    a product listed more than once gets the quantities added up.
+    """
+    if not isinstance(products, list):
+        return None
+    lines = {}
+    for item in products:
+        if isinstance(item, dict):
+            product_id, quantity = item.get("product_id"), item.get("quantity", 1)
+        else:
+            product_id, quantity = item, 1
+        if not isinstance(product_id, int) or not isinstance(quantity, int) or quantity < 1:
+            return None
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+def order_total(quantities, unit_prices):
+    return round(sum(quantity * unit_prices[id] for id, quantity in quantities.items()), 2)
+
+def reserve_stock(changes):
+    """Take {product_id: units} out of stock (negative units put it back) with one conditional UPDATE.
+
+    Only pass products whose stock is tracked: a NULL stock never satisfies the check.
+
+    A row only changes if it has enough stock left, and the check and the
+    decrement are the same statement, so concurrent orders can't both take the
+    last units; nothing is read first and no lock is held beyond the UPDATE's
+    own. Returns False if any product fell short: the caller must then fail the
+    request, which rolls back the rows that did change.
+
+    Call it before inserting rows that reference the products: their foreign-key
+    checks share-lock the product rows on InnoDB, and two transactions that both
+    hold such a lock deadlock when each then tries to UPDATE the row.
+    """
+    changes = {id: units for id, units in changes.items() if units}
+    if not changes:
+        return True
+    units = case(changes, value=Product.product_id)
+    statement = (
+        update(Product)
+        .where(Product.product_id.in_(changes), Product.stock >= units)
+        # version and updated_at move through their onupdate defaults, as for ORM updates
+        .values(stock=Product.stock - units)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(statement).rowcount != len(changes):
+        return False
+
+    def invalidate_cached():
+        for id in changes:
+            product_cache.invalidate(f"product:{id}")
+
+    on_commit(invalidate_cached)
+    return True
+
+def tracked_stock(changes):
+    """The part of {product_id: units} for products whose stock is tracked (not NULL)."""
+    changes = {id: units for id, units in changes.items() if units}
+    if not changes:
+        return {}
+    query = select(Product.product_id).where(Product.product_id.in_(changes), Product.stock.is_not(None))
+    return {id: changes[id] for id in db.session.scalars(query)}
+
+def out_of_stock(wanted):
+    """The products in {product_id: units} that have fewer than that many units in stock."""
+    query = select(Product.product_id, Product.stock).where(Product.product_id.in_(wanted))
+    return sorted(id for id, stock in db.session.execute(query) if stock is not None and stock < wanted[id])
+
+def stock_error(wanted):
+    # roll back what reserve_stock() already took before reading stock for the message
+    db.session.rollback()
+    return jsonify({"Error": f"Not enough stock for products {out_of_stock(wanted)}"}), 409
+
+@api.route("/orders", methods=["POST"])
+@idempotent
+def add_order():
+    try:
+        json_order = request.json
+        products = json_order.pop('products', [])
+        if not products:
+            return jsonify({"Error": "Cannot place an order without products"}), 400
+
+        # Validate the order data excluding products
+        order_data = order_schema.load(json_order)
+    except ValidationError as err:
+        # If there's a validation error, return a 400 response with error messages
+        return jsonify(err.messages), 400
+
+    lines = order_lines(products)
+    if lines is None:
+        return jsonify({"Error": LINES_ERROR}), 400
+
+    # Resolve every product ID, its current price and whether its stock is tracked in a single IN (...) query
+    query = select(Product.product_id, Product.price, Product.stock).where(Product.product_id.in_(lines))
+    rows = db.session.execute(query).all()
+    prices = {row.product_id: row.price for row in rows}
+    tracked = {row.product_id: lines[row.product_id] for row in rows if row.stock is not None}
+    missing = [id for id in lines if id not in prices]
+    if missing:
+        return jsonify({"Error": f"Products with IDs {missing} not found"}), 404
+    # first: the lines' foreign-key checks share-lock the product rows (InnoDB), and two orders
+    # holding those shared locks would deadlock upgrading them here; taking the stock first means
+    # the checks find the rows already locked by this transaction
+    if not reserve_stock(tracked):
+        return stock_error(tracked)
+
+    # Create a new order instance; its total is stored so reads never join to Products
+    new_order = Order(customer_id=order_data['customer_id'], date=order_data['date'], total=order_total(lines, prices))
+    db.session.add(new_order)
+    db.session.flush()
+
+    # Write all line items in one multi-row insert, snapshotting each product's price
+    db.session.execute(
+        insert(order_product),
+        [{"order_id": new_order.order_id, "product_id": id, "quantity": quantity, "unit_price": prices[id]}
+         for id, quantity in lines.items()],
+    )
+    order_id = new_order.order_id
+    log.info("order %s placed with %d products", order_id, len(lines),
+             extra={"order_id": order_id, "customer_id": order_data['customer_id']})
+
+    return jsonify({"message": "Order was successfully placed!", "order_id": order_id}), 201
+
+
+@api.route("/orders", methods=["GET"])
+@conditional(lambda: table_validators(Order, Product), vary="Accept")
+def get_orders():
+    names = fields_arg(orders_schema)
+    if wants_stream():
+        only_columns = load_only(*select_columns(ORDER_COLUMNS, names, Order.order_id), raiseload=True)
+        query = select(Order).order_by(Order.order_id).options(only_columns)
+        if "products" in names:
+            query = query.options(selectinload(Order.products))
+        return stream_ndjson(db.session, query.options(raiseload("*")), partial_schema(order_schema, names))
+    try:
+        limit, cursor, sort_column, descending = page_args(ORDER_SORT_KEYS, "order_id")
+        query = select(*select_columns(ORDER_COLUMNS, names, sort_column, Order.order_id))
+        query, columns = keyset_page(query, Order.order_id, sort_column, limit, cursor, descending)
+    except PaginationError as err:
+        return jsonify({"error": str(err)}), 400
+    rows, next_cursor = finish_page(db.session.execute(query).all(), columns, limit)
+    return add_next_link(orders_response(rows, names), next_cursor)
+
+def order_lines_query(rows, names):
+    """The one query for a page's line items, in the same order as Order.products; None when not needed."""
+    if not rows or "products" not in names:
+        return None
+    return (
+        select(order_product.c.order_id, *PRODUCT_COLUMNS)
+        .join(Product, Product.product_id == order_product.c.product_id)
+        .where(order_product.c.order_id.in_([row.order_id for row in rows]))
+        .order_by(order_product.c.order_id, Product.product_id)
+    )
+
+def serialize_orders(rows, lines, names):
+    """Orders' dicts from ORDER_COLUMNS rows and their line rows; returns (data, the floats in it)."""
+    serialize = row_serializer(order_schema, tuple(name for name in names if name != "products"))
+    products = defaultdict(list)
+    for line in lines:
+        products[line[0]].append(serialize_product_row(line[1:]))
+    data = []
+    for row in rows:
+        order = serialize(row)
+        if "products" in names:
+            order["products"] = products[row.order_id]
+        data.append(order)
+    floats = [line.price for line in lines]
+    if "total" in names:
+        floats += [row.total for row in rows]
+    return data, floats
+
+def orders_response(rows, names):
+    """JSON for a page of ORDER_COLUMNS rows; all their line items come from one extra query."""
+    lines_query = order_lines_query(rows, names)
+    lines = [] if lines_query is None else db.session.execute(lines_query).all()
+    with timed_phase("serialize"):
+        data, floats = serialize_orders(rows, lines, names)
+    with timed_phase("json"):
+        return json_response(data, floats)
+
+def order_validators(order_id):
+    # the response nests the order's products, so their versions are part of the validator too
+    query = (
+        select(Order.version, Order.updated_at, func.sum(Product.version), func.max(Product.updated_at))
+        .outerjoin(order_product, order_product.c.order_id == Order.order_id)
+        .outerjoin(Product, Product.product_id == order_product.c.product_id)
+        .where(Order.order_id == order_id)
+        .group_by(Order.order_id, Order.version, Order.updated_at)
+    )
+    row = db.session.execute(query).first()
+    if row is None:
+        return None
+    version, updated_at, product_versions, products_updated_at = row
+    last_modified = max(filter(None, [updated_at, products_updated_at]))
+    return make_etag("order", order_id, version, product_versions, request.args.get("fields")), last_modified
+
+@api.route("/orders/<int:order_id>", methods=["GET"])
+@conditional(order_validators)
+def get_orders_by_id(order_id):
+    names = fields_arg(orders_schema)
+    only_columns = load_only(*select_columns(ORDER_COLUMNS, names, Order.order_id), raiseload=True)
+    query = select(Order).filter(Order.order_id==order_id).options(only_columns)
+    if "products" in names:
+        query = query.options(selectinload(Order.products))
+    result = db.session.execute(query).scalars()
+    if result is None:
+            return jsonify({"message": "Order Not Found"}), 404
+    order = result.all()
+    try:
+        return partial_schema(orders_schema, names).jsonify(order)
+    except ValidationError as err:
+            #if we error let them know
+            return jsonify(err.messages), 400
+
+
+@api.route('/orders/<int:order_id>', methods=["PUT"])
+def update_order(order_id):
+    try:
+        json_order = request.json
+        products = json_order.pop('products', None)
+        
+        # Validate the order data excluding products
+        order_data = order_schema.load(json_order, partial=True)
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+    
+    query = select(Order).filter(Order.order_id == order_id)
+    result = db.session.execute(query).scalar()
+    if result is None:
+        return jsonify({"message": "Order Not Found"}), 404
+    
+    order = result
+    
+    for field, value in order_data.items():
+        setattr(order, field, value)
+    
+    # If products are provided, apply only the difference to the order's line items
+    if products is not None:
+        wanted = order_lines(products)
+        if wanted is None:
+            return jsonify({"Error": LINES_ERROR}), 400
+        current_query = (
+            select(order_product.c.product_id, order_product.c.quantity, order_product.c.unit_price)
+            .where(order_product.c.order_id == order_id)
+        )
+        current = {line.product_id: line for line in db.session.execute(current_query)}
+        added = [id for id in wanted if id not in current]
+        removed = [id for id in current if id not in wanted]
+        changed = [id for id in wanted if id in current and current[id].quantity != wanted[id]]
+        # lines already on the order keep the price they were ordered at
+        prices = {id: line.unit_price for id, line in current.items()}
+
+        if added:
+            query = select(Product.product_id, Product.price).where(Product.product_id.in_(added))
+            prices.update(db.session.execute(query).all())
+            missing = [id for id in added if id not in prices]
+            if missing:
+                return jsonify({"Error": f"Products with IDs {missing} not found"}), 404
+        if added or removed or changed:
+            # stock follows the lines: added and raised quantities take more, removed and lowered ones give it back.
+            # Before the line writes, whose foreign-key checks would otherwise share-lock the products first
+            more = tracked_stock({id: wanted.get(id, 0) - (current[id].quantity if id in current else 0)
+                                  for id in wanted.keys() | current.keys()})
+            if not reserve_stock(more):
+                return stock_error({id: units for id, units in more.items() if units > 0})
+        if removed:
+            db.session.execute(
+                delete(order_product).where(
+                    order_product.c.order_id == order_id,
+                    order_product.c.product_id.in_(removed),
+                )
+            )
+        if changed:
+            db.session.execute(
+                update(order_product)
+                .where(order_product.c.order_id == order_id, order_product.c.product_id == bindparam("line_product_id"))
+                .values(quantity=bindparam("line_quantity")),
+                [{"line_product_id": id, "line_quantity": wanted[id]} for id in changed],
+            )
+        if added:
+            db.session.execute(
+                insert(order_product),
+                [{"order_id": order_id, "product_id": id, "quantity": wanted[id], "unit_price": prices[id]} for id in added],
+            )
+        if added or removed or changed:
+            # line items live in Order_Product, so touch the order to move its version/ETag
+            order.total = order_total(wanted, prices)
+            order.updated_at = utcnow()
+
+    return jsonify({"message": "Order was successfully updated!"}), 200
+        
+@api.route("/orders/<int:order_id>", methods=["DELETE"])
+def delete_order(order_id):
+    lines_query = select(order_product.c.product_id, order_product.c.quantity).where(order_product.c.order_id == order_id)
+    # the order's lines give their units back, as removing them with PUT /orders/<id> would;
+    # putting stock back can't fall short, so the result needs no check
+    reserve_stock(tracked_stock({id: -quantity for id, quantity in db.session.execute(lines_query)}))
+    db.session.execute(delete(order_product).where(order_product.c.order_id == order_id))
+    delete_statement = delete(Order).where(Order.order_id==order_id)
+    result = db.session.execute(delete_statement)
+    if result.rowcount == 0:
+        return jsonify({"error": "Order not found" }), 404
+    return jsonify({"message": "Order removed successfully"}), 200
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+@api.route("/")
+def home():
+    return "<h1>This a tasty api (ヘ･_･)ヘ┳━┳  (╯°□°）╯︵ ┻━┻</h1>"
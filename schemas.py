@@ -0,0 +1,69 @@
+import flask
+from flask_marshmallow import Marshmallow
+from marshmallow import fields, validate
+from instrumentation import timed_phase
+
+
+ma = Marshmallow() 
+
+
+class TimedSchema(ma.Schema):
+    """Reports dump() and JSON encoding time to the request's Server-Timing header."""
+
+    def dump(self, obj, *, many=None):
+        with timed_phase("serialize"):
+            return super().dump(obj, many=many)
+
+    def jsonify(self, obj, many=None, *args, **kwargs):
+        data = self.dump(obj, many=self.many if many is None else many)
+        with timed_phase("json"):
+            return flask.jsonify(data, *args, **kwargs)
+
+
+class CustomerSchema(TimedSchema):
+    customer_id = fields.Integer()
+    name = fields.String(required=True)
+    email = fields.String(required=True)
+    phone = fields.String(required=True)
+
+    class Meta:
+        fields = ("customer_id", "email", "name", "phone")
+
+customer_schema = CustomerSchema()
+customers_schema = CustomerSchema(many=True)
+
+class CustomerOrdersSchema(CustomerSchema):
+    orders = fields.List(fields.Nested("OrderSchema"))
+
+    class Meta:
+        fields = ("customer_id", "email", "name", "phone", "orders")
+
+customer_orders_schema = CustomerOrdersSchema()
+customers_orders_schema = CustomerOrdersSchema(many=True)
+
+
+class ProductSchema(TimedSchema):
+    product_id = fields.Integer(required=False)
+    name = fields.String(required=True, validate=validate.Length(min=1))
+    price = fields.Float(required=True, validate=validate.Range(min=0))
+    # null (the default) leaves the product's stock untracked
+    stock = fields.Integer(allow_none=True, validate=validate.Range(min=0))
+
+    class Meta:
+        fields = ("product_id", "name", "price", "stock")
+
+product_schema = ProductSchema()
+products_schema = ProductSchema(many=True)
+
+
+class OrderSchema(TimedSchema):
+    order_id = fields.Integer(required=False)
+    customer_id = fields.Integer(required=True)
+    date = fields.Date(required=True)
+    total = fields.Float(dump_only=True)
+    products = fields.List(fields.Nested(ProductSchema))
+
+    class Meta:
+        fields = ("order_id", "customer_id", "date", "total", "products")
+order_schema = OrderSchema()
+orders_schema = OrderSchema(many=True)
@@ -0,0 +1,133 @@
+import re
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import DDL, event, false, func
+
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _escape_like(term):
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def install_search_indexes(table, column, index_prefix):
+    """Create the backend's text index on table.column alongside the table.
+
+    Postgres gets a pg_trgm GIN index (serves ILIKE '%term%' and similarity()),
+    MySQL a FULLTEXT index. SQLite has neither and uses TrigramIndex instead.
+    """
+    event.listen(table, "after_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+    event.listen(
+        table,
+        "after_create",
+        DDL(f'CREATE INDEX {index_prefix}_trgm ON "{table.name}" USING gin ({column} gin_trgm_ops)').execute_if(
+            dialect="postgresql"
+        ),
+    )
+    event.listen(
+        table,
+        "after_create",
+        DDL(f"CREATE FULLTEXT INDEX {index_prefix}_fulltext ON `{table.name}` ({column})").execute_if(dialect="mysql"),
+    )
+
+
+def ranked_search(query, column, pk_column, dialect_name, term):
+    """Filter and rank query by relevance of column to term on backends with a native text index.
+
+    Returns None when the backend has no native index (use TrigramIndex instead).
+    """
+    if dialect_name == "postgresql":
+        match = column.ilike(f"%{_escape_like(term)}%", escape="/")
+        return query.where(match).order_by(func.similarity(column, term).desc(), pk_column)
+    if dialect_name in ("mysql", "mariadb"):
+        words = re.findall(r"\w+", term)
+        if not words:
+            return query.where(false())
+        score = column.match(" ".join(f"+{word}*" for word in words))
+        return query.where(score).order_by(score.desc(), pk_column)
+    return None
+
+
+class TrigramIndex:
+    """In-process inverted trigram index, the search fallback for databases without one.
+
+    Matches case-insensitive substrings like LIKE '%term%' but only verifies the
+    candidates that share every trigram of the term. Results rank exact matches,
+    then prefix matches, then word-start matches, then shorter names first.
+    The index is built from the database on first use, kept current by add()
+    and remove() for writes made in this process, and rebuilt after ttl seconds
+    to pick up writes made by other workers.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._postings = defaultdict(set)
+        self._docs = {}
+        self._built_at = None
+
+    def is_stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+
+    def build(self, rows):
+        postings = defaultdict(set)
+        docs = {}
+        for doc_id, text in rows:
+            text = text.lower()
+            docs[doc_id] = text
+            for gram in _grams(text):
+                postings[gram].add(doc_id)
+        with self._lock:
+            self._postings = postings
+            self._docs = docs
+            self._built_at = time.monotonic()
+
+    def add(self, doc_id, text):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove(doc_id)
+            text = text.lower()
+            self._docs[doc_id] = text
+            for gram in _grams(text):
+                self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        text = self._docs.pop(doc_id, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, term):
+        """Return the ids of every document containing term, best match first."""
+        term = term.lower()
+        with self._lock:
+            grams = _grams(term)
+            if grams:
+                postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+                candidates = set.intersection(*postings)
+            else:
+                # terms shorter than a trigram have nothing to look up
+                candidates = self._docs.keys()
+            matches = [(doc_id, self._docs[doc_id]) for doc_id in candidates if term in self._docs[doc_id]]
+
+        def rank(match):
+            doc_id, text = match
+            position = text.find(term)
+            word_start = position == 0 or not text[position - 1].isalnum()
+            return (text != term, position != 0, not word_start, len(text), doc_id)
+
+        return [doc_id for doc_id, _ in sorted(matches, key=rank)]
@@ -0,0 +1,32 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream():
+    """True for ?stream=1 or when the client prefers NDJSON over JSON."""
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE and request.accept_mimetypes[NDJSON_MIMETYPE] > 0
+
+
+def stream_ndjson(session, query, schema, batch_size=STREAM_BATCH_SIZE):
+    """Stream every row of query as one JSON document per line.
+
+    Rows are fetched through a server-side cursor in batch_size chunks and
+    serialized one at a time, so memory stays flat regardless of table size.
+    """
+    query = query.execution_options(yield_per=batch_size, stream_results=True)
+    dumps = current_app.json.dumps
+
+    def generate():
+        result = session.execute(query).scalars()
+        try:
+            for partition in result.partitions():
+                yield "".join(dumps(schema.dump(obj)) + "\n" for obj in partition)
+        finally:
+            result.close()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,25 @@
+import pytest
+
+import routes
+from app import create_app
+from cache import LRUCache, TwoTierCache
+from models import db
+from search import TrigramIndex
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # the product cache and search index are module state; every test starts with empty ones
+    monkeypatch.setattr(routes, "product_cache", TwoTierCache(LRUCache()))
+    monkeypatch.setattr(routes, "product_index", TrigramIndex())
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/test.db", "LOG_LEVEL": "WARNING"})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
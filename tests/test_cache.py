@@ -0,0 +1,28 @@
+from cache import LRUCache, MemoryStore, TwoTierCache
+
+
+class SharedStore(MemoryStore):
+    # one instance handed to both caches stands in for a Redis every worker talks to
+    shared = True
+
+
+def test_workers_sharing_an_l2_see_each_others_writes():
+    store = SharedStore()
+    first, second = TwoTierCache(LRUCache(), store), TwoTierCache(LRUCache(), store)
+    assert first.get("product:1", lambda: {"version": 1}) == {"version": 1}
+    assert second.get("product:1", lambda: {"version": 0}) == {"version": 1}
+    first.refresh("product:1", {"version": 2})
+    assert second.get("product:1", lambda: None) == {"version": 2}
+    first.invalidate("product:1")
+    assert second.get("product:1", lambda: {"version": 3}) == {"version": 3}
+    assert second.stats()["l1"] is None
+
+
+def test_a_local_l2_keeps_the_l1_in_front():
+    cache = TwoTierCache(LRUCache(), MemoryStore())
+    loads = []
+    for _ in range(3):
+        cache.get("product:1", lambda: loads.append(1) or {"version": 1})
+    assert len(loads) == 1
+    assert cache.stats()["l1"]["hits"] == 2
+    assert cache.stats()["l2"] == {"hits": 0, "misses": 1}
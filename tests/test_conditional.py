@@ -0,0 +1,90 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+
+CUSTOMER = {"name": "Ann", "email": "ann@example.com", "phone": "5550000000"}
+
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+@pytest.fixture
+def shop(client):
+    assert client.post("/customers", json=CUSTOMER).status_code == 201
+    for name in ("Widget", "Gadget"):
+        assert client.post("/products", json={"name": name, "price": 2.0, "stock": 10}).status_code == 201
+    return client
+
+
+@pytest.mark.parametrize("method, url, body", [
+    ("post", "/products", {"name": "Sprocket", "price": 1.0}),
+    ("post", "/products/bulk", [{"name": "Bolt", "price": 0.1}, {"name": "Nut", "price": 0.1}]),
+    ("put", "/products/1", {"name": "Renamed", "price": 3.0}),
+    ("delete", "/products/2", None),
+    # reserving stock is a Core UPDATE of Products
+    ("post", "/orders", {"customer_id": 1, "date": "2024-06-01", "products": [1]}),
+])
+def test_every_kind_of_write_moves_the_listing_etag(shop, method, url, body):
+    before = etag(shop, "/products")
+    response = getattr(shop, method)(url, json=body)
+    assert response.status_code < 300, response.get_json()
+    after = etag(shop, "/products")
+    assert after != before
+    assert shop.get("/products", headers={"If-None-Match": after}).status_code == 304
+
+
+def test_reads_and_failed_writes_keep_the_listing_etag(shop):
+    before = etag(shop, "/products")
+    shop.get("/products/1")
+    # more than is in stock: the request fails and its writes are rolled back
+    order = {"customer_id": 1, "date": "2024-06-01", "products": [{"product_id": 1, "quantity": 11}]}
+    assert shop.post("/orders", json=order).status_code == 409
+    assert etag(shop, "/products") == before
+    assert etag(shop, "/customers") != before
+
+
+def test_writes_to_one_table_keep_other_listings_etags(shop):
+    customers = etag(shop, "/customers")
+    assert shop.put("/products/1", json={"name": "Renamed", "price": 3.0}).status_code == 200
+    assert etag(shop, "/customers") == customers
+    assert shop.delete("/customers/1").status_code == 200
+    assert etag(shop, "/customers") != customers
+
+
+def test_customer_orders_etag_follows_only_the_products_on_their_orders(shop):
+    assert shop.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": [1]}).status_code == 201
+    before = etag(shop, "/customers/1/orders")
+    assert shop.put("/products/2", json={"name": "Other", "price": 9.0}).status_code == 200
+    assert etag(shop, "/customers/1/orders") == before
+    assert shop.put("/products/1", json={"name": "Renamed", "price": 3.0}).status_code == 200
+    assert etag(shop, "/customers/1/orders") != before
+
+
+def test_writers_only_touch_the_rows_they_change(app, shop):
+    # no shared counter row that every writer of a table would queue on
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    assert shop.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": [1]}).status_code == 201
+    written = {match.group(1) for match in map(re.compile(r'(?:INSERT INTO|UPDATE|DELETE FROM) "(\w+)"').match, statements) if match}
+    assert written == {"Products", "Orders", "Order_Product"}
+
+
+@pytest.mark.parametrize("url", ["/products", "/customers", "/orders"])
+def test_the_ndjson_export_has_its_own_etag(shop, url):
+    json_etag = etag(shop, url)
+    ndjson = shop.get(url, headers={"Accept": "application/x-ndjson"})
+    assert ndjson.status_code == 200 and ndjson.mimetype == "application/x-ndjson"
+    ndjson.get_data()
+    assert ndjson.headers["ETag"] != json_etag
+    assert "Accept" in ndjson.headers["Vary"] and "Accept" in shop.get(url).headers["Vary"]
+    stale = shop.get(url, headers={"Accept": "application/x-ndjson", "If-None-Match": json_etag})
+    assert stale.status_code == 200
+    stale.get_data()
+    assert shop.get(url, headers={"Accept": "application/x-ndjson", "If-None-Match": ndjson.headers["ETag"]}).status_code == 304
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from models import IdempotencyKey
+
+
+@pytest.mark.parametrize("dialect, expected", [
+    (mysql.dialect(), "response_body LONGTEXT"),
+    (mysql.dialect(is_mariadb=True), "response_body LONGTEXT"),
+    (sqlite.dialect(), "response_body TEXT"),
+])
+def test_stored_responses_are_not_capped_at_64kb_on_mysql(dialect, expected):
+    assert expected in str(CreateTable(IdempotencyKey.__table__).compile(dialect=dialect))
+
+
+def test_a_large_bulk_reply_is_replayed(client):
+    products = [{"name": f"Bulk product {n}", "price": 1.5} for n in range(5000)]
+    headers = {"Idempotency-Key": "bulk-1"}
+    first = client.post("/products/bulk", json=products, headers=headers)
+    assert first.status_code == 201 and len(first.data) > 64 * 1024
+    again = client.post("/products/bulk", json=products, headers=headers)
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.data == first.data
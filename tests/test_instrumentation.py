@@ -0,0 +1,24 @@
+import copy
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+
+def test_failed_statements_leave_nothing_on_the_connection(app):
+    with app.app_context(), db.engine.connect() as conn:
+        before = copy.deepcopy(conn.info)
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM missing")
+        conn.exec_driver_sql("SELECT 1")
+        assert conn.info == before
+
+
+def test_replayed_requests_are_still_timed(client):
+    headers = {"Idempotency-Key": "timed"}
+    for _ in range(3):
+        response = client.post("/products", json={"name": "Washer", "price": 0.2}, headers=headers)
+        assert response.status_code == 201
+    assert "db;dur=" in response.headers["Server-Timing"]
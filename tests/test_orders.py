@@ -0,0 +1,83 @@
+import re
+
+import pytest
+from sqlalchemy import event, select
+
+from models import db, order_product
+
+CUSTOMER = {"name": "Ann", "email": "ann@example.com", "phone": "5550000000"}
+
+
+@pytest.fixture
+def shop(client):
+    assert client.post("/customers", json=CUSTOMER).status_code == 201
+    # product 1 doesn't track stock, product 2 has two units
+    assert client.post("/products", json={"name": "Untracked", "price": 1.0}).status_code == 201
+    assert client.post("/products", json={"name": "Scarce", "price": 2.0, "stock": 2}).status_code == 201
+    return client
+
+
+def order(*lines):
+    return {"customer_id": 1, "date": "2024-06-01", "products": list(lines)}
+
+
+def stock(client, product_id):
+    return client.get(f"/products/{product_id}").get_json()["stock"]
+
+
+def test_products_without_stock_are_untracked(shop):
+    assert stock(shop, 1) is None
+    assert [p["stock"] for p in shop.get("/products").get_json()] == [None, 2]
+    response = shop.post("/orders", json=order({"product_id": 1, "quantity": 50}))
+    assert response.status_code == 201, response.get_json()
+    assert stock(shop, 1) is None
+
+
+def test_tracked_stock_is_taken_and_never_oversold(shop):
+    assert shop.post("/orders", json=order(1, {"product_id": 2, "quantity": 2})).status_code == 201
+    assert stock(shop, 2) == 0
+    response = shop.post("/orders", json=order(1, 2))
+    assert response.status_code == 409
+    assert response.get_json() == {"Error": "Not enough stock for products [2]"}
+    assert len(shop.get("/orders").get_json()) == 1
+
+
+def test_updating_an_order_moves_only_tracked_stock(shop):
+    assert shop.post("/orders", json=order(1)).status_code == 201
+    assert shop.put("/orders/1", json={"products": [{"product_id": 1, "quantity": 9}, 2]}).status_code == 200
+    assert (stock(shop, 1), stock(shop, 2)) == (None, 1)
+    assert shop.put("/orders/1", json={"products": [{"product_id": 2, "quantity": 3}]}).status_code == 409
+    assert shop.put("/orders/1", json={"products": [1]}).status_code == 200
+    assert stock(shop, 2) == 2
+
+
+def test_stock_can_be_tracked_later(shop):
+    assert shop.put("/products/1", json={"name": "Untracked", "price": 1.0, "stock": 1}).status_code == 200
+    assert shop.post("/orders", json=order(1)).status_code == 201
+    assert shop.post("/orders", json=order(1)).status_code == 409
+
+
+def test_stock_is_taken_before_the_order_rows_are_written(app, shop):
+    # lines inserted first would share-lock the product rows and deadlock concurrent orders on InnoDB
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    writes = lambda: [match.group(0) for match in map(re.compile(r'(INSERT INTO|UPDATE) "\w+"').match, statements) if match]
+
+    assert shop.post("/orders", json=order(2)).status_code == 201
+    assert writes()[:3] == ['UPDATE "Products"', 'INSERT INTO "Orders"', 'INSERT INTO "Order_Product"']
+    statements.clear()
+    assert shop.put("/orders/1", json={"products": [1, {"product_id": 2, "quantity": 2}]}).status_code == 200
+    assert writes()[:2] == ['UPDATE "Products"', 'UPDATE "Order_Product"']
+
+
+def test_deleting_an_order_returns_its_stock(shop):
+    assert shop.put("/products/2", json={"name": "Scarce", "price": 2.0, "stock": 5}).status_code == 200
+    assert shop.post("/orders", json=order(1, {"product_id": 2, "quantity": 3})).status_code == 201
+    assert stock(shop, 2) == 2
+    assert shop.delete("/orders/1").status_code == 200
+    assert (stock(shop, 1), stock(shop, 2)) == (None, 5)
+    assert shop.get("/orders").get_json() == []
+    with shop.application.app_context():
+        assert db.session.execute(select(order_product)).all() == []
+    assert shop.delete("/orders/1").status_code == 404
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+from sqlalchemy import select
+
+import routes
+from bench import seed
+from models import db, Order, Product
+from pagination import encode_cursor, finish_page, keyset_page
+
+ROWS = 3000
+
+
+def vm_steps(statement):
+    """Run statement and return how many SQLite VM instructions (in hundreds) it took."""
+    raw = db.session.connection().connection.driver_connection
+    steps = 0
+
+    def count():
+        nonlocal steps
+        steps += 1
+
+    raw.set_progress_handler(count, 100)
+    try:
+        db.session.execute(statement).all()
+    finally:
+        raw.set_progress_handler(None, 100)
+    return steps
+
+
+PAGES = {
+    "products by price": (lambda: select(*routes.PRODUCT_COLUMNS), Product.product_id, Product.price, False),
+    "products by name": (lambda: select(*routes.PRODUCT_COLUMNS), Product.product_id, Product.name, False),
+    "products by -price": (lambda: select(*routes.PRODUCT_COLUMNS), Product.product_id, Product.price, True),
+    "orders by date": (lambda: select(*routes.ORDER_COLUMNS), Order.order_id, Order.date, False),
+    "customer order history": (lambda: select(*routes.ORDER_COLUMNS).where(Order.customer_id == 1),
+                               Order.order_id, Order.date, True),
+}
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_deep_pages_cost_the_same_as_shallow_ones(app, name):
+    query, pk, sort_column, descending = PAGES[name]
+    seed(app, customers=2, products=ROWS, orders=ROWS, lines_per_order=1, spares=0, rng=random.Random(1))
+    with app.app_context():
+        ordered = keyset_page(query(), pk, sort_column, ROWS, descending=descending)[0]
+        rows = db.session.execute(ordered).all()
+        assert len(rows) > 1000
+
+        def page_after(position):
+            cursor = encode_cursor([getattr(rows[position], sort_column.key), getattr(rows[position], pk.key)])
+            return keyset_page(query(), pk, sort_column, 20, cursor, descending)[0]
+
+        shallow = vm_steps(page_after(20))
+        deep = vm_steps(page_after(len(rows) - 30))
+        # a scan from the start of the index would cost ~100x more on the deep page
+        assert deep <= 2 * shallow + 5, (shallow, deep)
+
+
+def test_walking_the_cursor_visits_every_row_once(app):
+    seed(app, customers=2, products=250, orders=10, lines_per_order=1, spares=0, rng=random.Random(2))
+    with app.app_context():
+        seen, cursor = [], None
+        while True:
+            statement, columns = keyset_page(select(*routes.PRODUCT_COLUMNS), Product.product_id, Product.price,
+                                             40, cursor, descending=True)
+            rows, cursor = finish_page(db.session.execute(statement).all(), columns, 40)
+            seen += [row.product_id for row in rows]
+            if cursor is None:
+                break
+        expected = db.session.scalars(select(Product.product_id)
+                                      .order_by(Product.price.desc(), Product.product_id.desc())).all()
+        assert seen == expected
+
+
+@pytest.mark.parametrize("url", [
+    "/products?limit=2&endpoint=x",
+    "/products?limit=2&_method=POST",
+    "/products?limit=2&_anchor=top&_external=1",
+    "/customers/1/orders?limit=2&id=5",
+    "/orders?limit=2&sort=-date&fields=order_id,date",
+])
+def test_next_link_keeps_the_path_and_every_query_arg(app, client, url):
+    seed(app, customers=1, products=10, orders=10, lines_per_order=1, spares=0, rng=random.Random(3))
+    response = client.get(url)
+    assert response.status_code == 200
+    link = response.headers["Link"]
+    path, query = url.split("?")
+    assert link.startswith(f"<{path}?{query}&cursor=") and link.endswith('>; rel="next"')
+    assert client.get(link[1:link.index(">")]).status_code == 200
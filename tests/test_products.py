@@ -0,0 +1,37 @@
+from sqlalchemy import event
+
+import routes
+from models import db
+
+
+def test_add_product_is_readable_once_created(client):
+    response = client.post("/products", json={"name": "Blue widget", "price": 4.5, "stock": 3})
+    assert response.status_code == 201, response.get_json()
+    # the new id is read before the commit, then used by the cache and search index once it lands
+    product = client.get("/products/1")
+    assert product.status_code == 200
+    assert product.get_json() == {"product_id": 1, "name": "Blue widget", "price": 4.5, "stock": 3}
+    assert product.headers["ETag"]
+    assert [p["product_id"] for p in client.get("/products/by-name?name=blue").get_json()] == [1]
+
+
+def test_bulk_add_inserts_each_batch_in_one_statement(app, client, monkeypatch):
+    monkeypatch.setattr(routes, "BULK_BATCH_SIZE", 40)
+    client.post("/products", json={"name": "Existing", "price": 1})
+    items = [{"name": f"Part {n}", "price": n, **({"stock": n} if n % 2 else {})} for n in range(100)]
+    items[7] = {"name": "No price"}
+    inserts = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, *args: sql.startswith('INSERT INTO "Products"') and inserts.append(sql))
+
+    response = client.post("/products/bulk", json=items)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert list(body["errors"]) == ["7"]
+    assert len(inserts) == 3
+    # every generated id is matched back to the item it was created from
+    for item in body["created"]:
+        product = client.get(f"/products/{item['product_id']}").get_json()
+        n = item["index"]
+        assert product == {"product_id": item["product_id"], "name": f"Part {n}", "price": n, "stock": n if n % 2 else None}
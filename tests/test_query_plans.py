@@ -0,0 +1,35 @@
+import random
+
+import pytest
+from sqlalchemy import and_, func, or_, select
+
+import routes
+from bench import hot_queries, plan_problems, seed
+from models import db, Product
+
+
+@pytest.fixture
+def connection(app):
+    seed(app, customers=20, products=500, orders=500, lines_per_order=3, spares=0, rng=random.Random(4))
+    with app.app_context(), db.engine.connect() as connection:
+        yield connection
+
+
+@pytest.mark.parametrize("name", hot_queries())
+def test_hot_queries_seek_an_index(connection, name):
+    assert plan_problems(connection, hot_queries()[name]) == []
+
+
+def test_a_keyset_page_without_a_range_bound_is_reported(connection):
+    # the bare OR form of the seek predicate walks the index from its start on every page
+    page = (
+        select(*routes.PRODUCT_COLUMNS)
+        .where(or_(Product.price > 100.0, and_(Product.price == 100.0, Product.product_id > 1)))
+        .order_by(Product.price, Product.product_id)
+        .limit(101)
+    )
+    assert plan_problems(connection, page) == ["SCAN Products USING INDEX ix_products_price_product_id"]
+
+
+def test_a_table_scan_is_reported(connection):
+    assert plan_problems(connection, select(Product.product_id).where(func.lower(Product.name) == "x")) == ["SCAN Products"]
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import insert
+
+import routes
+from app import create_app
+from cache import LRUCache, TwoTierCache
+from models import db, Base, Customer, Product
+from replicas import PIN_COOKIE, PIN_HEADER
+from search import TrigramIndex
+
+CUSTOMER = {"name": "Ann", "email": "ann@example.com", "phone": "5550000000"}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app on a primary and a replica that never catches up, both holding a product with 5 in stock."""
+    monkeypatch.setattr(routes, "product_cache", TwoTierCache(LRUCache()))
+    monkeypatch.setattr(routes, "product_index", TrigramIndex())
+    # init_app() registers a metadata per bind key on the shared db; keep the replica's out of later tests
+    monkeypatch.setattr(db, "metadatas", dict(db.metadatas))
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/primary.db",
+        "SQLALCHEMY_BINDS": {"replica_0": f"sqlite:///{tmp_path}/replica.db"},
+        "LOG_LEVEL": "WARNING",
+    })
+    with app.app_context():
+        for engine in db.engines.values():
+            Base.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(insert(Customer), [dict(CUSTOMER, version=1)])
+                connection.execute(insert(Product), [{"name": "Widget", "price": 2.0, "stock": 5, "version": 1}])
+    yield app.test_client()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_reads_go_to_the_replica_and_writers_to_the_primary(client):
+    response = client.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": [{"product_id": 1, "quantity": 3}]})
+    assert response.status_code == 201
+    client.delete_cookie(PIN_COOKIE)
+    assert client.get("/products").get_json()[0]["stock"] == 5
+    assert client.get("/products", headers={PIN_HEADER: response.headers[PIN_HEADER]}).get_json()[0]["stock"] == 2
+
+
+def test_the_product_cache_is_never_filled_from_a_replica(client):
+    response = client.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": [{"product_id": 1, "quantity": 3}]})
+    assert response.status_code == 201
+    # an unpinned read misses the cache (the order invalidated it) and refills it
+    client.delete_cookie(PIN_COOKIE)
+    assert client.get("/products/1").get_json()["stock"] == 2
+    assert client.get("/products/1", headers={PIN_HEADER: response.headers[PIN_HEADER]}).get_json()["stock"] == 2
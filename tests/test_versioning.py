@@ -0,0 +1,38 @@
+from sqlalchemy.orm import Session
+
+from models import db, Product
+
+
+def add_product(client, **fields):
+    response = client.post("/products", json={"name": "Widget", "price": 2.5, **fields})
+    assert response.status_code == 201, response.get_json()
+    return client.get("/products?limit=1&sort=-product_id").get_json()[0]["product_id"]
+
+
+def test_concurrent_updates_of_a_row_both_commit(app):
+    with app.app_context():
+        db.session.add(Product(name="Widget", price=1.0))
+        db.session.commit()
+        first, second = Session(db.engine), Session(db.engine)
+        # both load version 1 before either writes
+        a, b = first.get(Product, 1), second.get(Product, 1)
+        a.price = 2.0
+        first.commit()
+        b.name = "Renamed widget"
+        second.commit()
+        first.close(), second.close()
+        product = db.session.get(Product, 1)
+        assert (product.name, product.price, product.version) == ("Renamed widget", 2.0, 3)
+
+
+def test_updates_move_the_etag(client):
+    product_id = add_product(client, stock=5)
+    etags = [client.get(f"/products/{product_id}").headers["ETag"]]
+    assert client.put(f"/products/{product_id}", json={"name": "Renamed", "price": 3.0}).status_code == 200
+    etags.append(client.get(f"/products/{product_id}").headers["ETag"])
+    # an order reserves stock with a Core UPDATE, which bumps the version too
+    customer = {"name": "Ann", "email": "ann@example.com", "phone": "5550000000"}
+    assert client.post("/customers", json=customer).status_code == 201
+    assert client.post("/orders", json={"customer_id": 1, "date": "2024-06-01", "products": [product_id]}).status_code == 201
+    etags.append(client.get(f"/products/{product_id}").headers["ETag"])
+    assert len(set(etags)) == 3
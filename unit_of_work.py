@@ -0,0 +1,36 @@
+from flask import g, request
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def on_commit(callback):
+    """Run callback once the current request's transaction has committed (cache refreshes, index updates)."""
+    g.setdefault("on_commit", []).append(callback)
+
+
+def init_unit_of_work(app, db):
+    """Give every request one transactional db.session, committed or rolled back after the view.
+
+    Write requests that return a 2xx/3xx response are committed; any other write
+    response is rolled back. Read-only requests never flush or commit: their
+    session is simply closed with the app context, which returns the connection
+    without a COMMIT round trip.
+    """
+
+    @app.after_request
+    def finish_unit_of_work(response):
+        if request.method not in WRITE_METHODS:
+            return response
+        if response.status_code < 400:
+            db.session.commit()
+            for callback in g.pop("on_commit", []):
+                callback()
+        else:
+            db.session.rollback()
+        return response
+
+    @app.teardown_request
+    def rollback_unit_of_work(exc):
+        g.pop("on_commit", None)
+        if exc is not None:
+            db.session.rollback()
@@ -0,0 +1,10 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py preloads this module in the master, so the imports and
+create_app() run once and the workers fork from the finished app.
+"""
+from app import create_app
+
+app = create_app()